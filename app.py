@@ -1,17 +1,44 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, render_template_string
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, make_response, send_from_directory
+from flask import before_render_template, template_rendered, has_request_context
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from werkzeug.utils import secure_filename, safe_join
+from werkzeug.http import is_resource_modified
+from jinja2 import FileSystemBytecodeCache
 import sqlite3
 import os
-from datetime import datetime
-import uuid
+from datetime import datetime, timezone, timedelta
+import tempfile
 import hmac
+import hashlib
+import json
+import mimetypes
+import threading
+import time
+import subprocess
+import sys
+import atexit
+import functools
+from collections import OrderedDict, namedtuple, deque
+from bisect import bisect_left
+from contextlib import contextmanager
+import re
+import html as html_lib
+from markupsafe import Markup, escape
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # without Pillow, uploads are served as-is (no derivatives)
+    Image = None
+try:
+    import fcntl
+except ImportError:  # Windows: migrations run without the cross-process lock
+    fcntl = None
 
 app = Flask(__name__)
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', os.urandom(24))
 app.config['UPLOAD_FOLDER'] = 'static/images'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+UPLOAD_CHUNK_SIZE = 64 * 1024
 # Secure cookie settings for production
 app.config['SESSION_COOKIE_SECURE'] = True
 app.config['SESSION_COOKIE_HTTPONLY'] = True
@@ -26,10 +53,604 @@ ADMIN_ACCESS_CODE = os.environ.get('ADMIN_ACCESS_CODE')
 # Debug / Template reload
 DEBUG = os.environ.get('FLASK_DEBUG', '0') in {'1', 'true', 'True'}
 app.config['TEMPLATES_AUTO_RELOAD'] = DEBUG
+# Compiled templates are cached on disk and shared by all worker processes; an
+# entry is reused only while its template's source hash matches (empty: a
+# per-user directory under the system temp dir)
+app.config['TEMPLATE_CACHE_DIR'] = os.environ.get('TEMPLATE_CACHE_DIR', '')
+
+# SQLite configuration (path and per-connection tuning)
+app.config['DATABASE'] = os.environ.get('BLOG_DB', 'blog.db')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = 5000
+app.config['SQLITE_SYNCHRONOUS'] = 'NORMAL'  # safe with WAL, fewer fsyncs than FULL
+app.config['SQLITE_CACHE_SIZE_KB'] = 16 * 1024
+app.config['SQLITE_MMAP_SIZE'] = 128 * 1024 * 1024
+# View counts are buffered in memory and written in batches
+app.config['VIEW_FLUSH_INTERVAL'] = float(os.environ.get('VIEW_FLUSH_INTERVAL', '15'))
+app.config['VIEW_FLUSH_THRESHOLD'] = 200
+# Rendered public pages kept in memory (LRU, entries)
+app.config['PAGE_CACHE_MAX_ENTRIES'] = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', '512'))
+# Background task workers (per process) and their retry policy
+app.config['TASK_WORKERS'] = int(os.environ.get('TASK_WORKERS', '2'))
+app.config['TASK_POLL_INTERVAL'] = 5
+app.config['TASK_LEASE_SECONDS'] = 600  # a job running longer is assumed dead and re-run
+app.config['TASK_MAX_ATTEMPTS'] = 5
+app.config['TASK_RETRY_DELAY'] = 30  # doubled after every failed attempt
+# Finished jobs are kept this many days for the dashboard, then pruned
+app.config['TASK_HISTORY_DAYS'] = int(os.environ.get('TASK_HISTORY_DAYS', '7'))
+app.config['TASK_PRUNE_INTERVAL'] = 24 * 3600
+# Trashed items older than this many days are purged automatically. Off (0)
+# unless the operator sets it, since the first sweep runs as soon as a worker starts.
+app.config['TRASH_RETENTION_DAYS'] = int(os.environ.get('TRASH_RETENTION_DAYS', '0'))
+app.config['TRASH_SWEEP_INTERVAL'] = 6 * 3600
+# Request/SQL/template timing (Server-Timing header and Prometheus /metrics)
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') not in {'0', 'false', 'False'}
+# Lets a scraper read /metrics with "Authorization: Bearer <token>" instead of an admin session
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+# Statements slower than this (execute plus fetches) are logged with their query plan; 0 disables
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', '50'))
+app.config['SLOW_QUERY_LOG_SIZE'] = 200
+# Optional JSON-lines file slow queries are also appended to
+app.config['SLOW_QUERY_LOG_FILE'] = os.environ.get('SLOW_QUERY_LOG_FILE')
+
+# Responsive image derivatives, written next to the uploads
+app.config['DERIVED_IMAGES_SUBDIR'] = 'derived'
+IMAGE_VARIANTS = [('thumb', 400), ('medium', 800), ('full', 1600)]
+IMAGE_WEBP_QUALITY = 80
+IMAGE_JPEG_QUALITY = 82
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    # An unwritable cache (directory removed, disk full) must never fail a render
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError as e:
+            print(f"Template bytecode cache write failed: {e}")
+
+def _template_bytecode_cache():
+    directory = app.config['TEMPLATE_CACHE_DIR'] or None
+    try:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return TemplateBytecodeCache(directory)
+    except (OSError, RuntimeError) as e:
+        print(f"Template bytecode cache disabled: {e}")
+        return None
+
+# Must be set before anything touches app.jinja_env
+app.jinja_options = {**app.jinja_options, 'bytecode_cache': _template_bytecode_cache()}
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif'}
 
+# Database connections: one long-lived connection per thread, reused across
+# requests instead of reconnecting every time. Waitress serves requests from a
+# fixed thread pool, so this is effectively a connection pool.
+_db_local = threading.local()
+_db_pool = []
+_db_pool_lock = threading.Lock()
+
+def _connect():
+    conn = sqlite3.connect(app.config['DATABASE'],
+                           timeout=app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000.0,
+                           check_same_thread=False,
+                           factory=TimedConnection if app.config['METRICS_ENABLED'] else sqlite3.Connection)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    # WAL lets readers proceed while a writer (e.g. the view counter) commits
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute(f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}")
+    c.execute(f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    c.execute(f"PRAGMA cache_size={-int(app.config['SQLITE_CACHE_SIZE_KB'])}")
+    c.execute(f"PRAGMA mmap_size={int(app.config['SQLITE_MMAP_SIZE'])}")
+    c.execute("PRAGMA temp_store=MEMORY")
+    c.close()
+    # Used by the search index backfill of migration 2 (see index_posts_for_search())
+    conn.create_function('fts_fold', 1, fold_search_text, deterministic=True)
+    conn.create_function('fts_fold_html', 1, _fold_search_html, deterministic=True)
+    return conn
+
+def get_db():
+    conn = getattr(_db_local, 'conn', None)
+    # A connection must never cross a fork, so key it on the owning process too
+    if conn is None or _db_local.pid != os.getpid():
+        conn = _connect()
+        _db_local.conn = conn
+        _db_local.pid = os.getpid()
+        _db_local.data_version = None
+        with _db_pool_lock:
+            _db_pool.append(conn)
+    return conn
+
+def close_db_pool():
+    with _db_pool_lock:
+        while _db_pool:
+            conn = _db_pool.pop()
+            try:
+                conn.close()
+            except Exception:
+                pass
+    _db_local.__dict__.clear()
+
+atexit.register(close_db_pool)
+
+@app.teardown_appcontext
+def _release_db(exc):
+    # Hand the connection back clean: never leave a transaction open between requests
+    conn = getattr(_db_local, 'conn', None)
+    if conn is not None and _db_local.pid == os.getpid() and conn.in_transaction:
+        conn.rollback()
+
+# Request instrumentation: wall time per route, SQL statements and template
+# rendering. Each request gets a Server-Timing header; the totals are exported
+# in Prometheus text format at ADMIN_PREFIX/metrics. Numbers are per process.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+METRICS_QUANTILES = (0.5, 0.95, 0.99)
+METRICS_WINDOW = 1024  # most recent samples per series the quantiles are computed from
+
+_request_local = threading.local()
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=METRICS_WINDOW)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+
+    def quantiles(self):
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {q: 0.0 for q in METRICS_QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in METRICS_QUANTILES}
+
+class RequestTimer:
+    __slots__ = ('start', 'sql_count', 'sql_seconds', 'template_seconds', 'template_starts')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_starts = []
+
+    def server_timing(self, elapsed, cache=None):
+        parts = [f'app;dur={elapsed * 1000:.1f}',
+                 f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.sql_count} queries"',
+                 f'tpl;dur={self.template_seconds * 1000:.1f}']
+        if cache:
+            parts.append(f'cache;desc="{cache}"')
+        return ', '.join(parts)
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self.started_at = time.time()
+        self.requests = {}  # (endpoint, method, status) -> count
+        self.latency = {}  # endpoint -> Histogram of seconds
+        self.queries = {}  # endpoint -> Histogram of statements per request
+        self.request_sql_seconds = {}
+        self.templates = {}  # template name -> Histogram of seconds
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+
+    def _check_fork(self):
+        # A forked worker starts from zero instead of repeating the parent's numbers
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._reset()
+
+    def observe_request(self, endpoint, method, status, elapsed, timer):
+        self._check_fork()
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if endpoint not in self.latency:
+                self.latency[endpoint] = Histogram(LATENCY_BUCKETS)
+                self.queries[endpoint] = Histogram(QUERY_COUNT_BUCKETS)
+                self.request_sql_seconds[endpoint] = 0.0
+            self.latency[endpoint].observe(elapsed)
+            self.queries[endpoint].observe(timer.sql_count)
+            self.request_sql_seconds[endpoint] += timer.sql_seconds
+            self.sql_count += timer.sql_count
+            self.sql_seconds += timer.sql_seconds
+
+    def observe_sql(self, statements, elapsed):
+        # Statements run outside a request (view counter flushes, task workers)
+        self._check_fork()
+        with self._lock:
+            self.sql_count += statements
+            self.sql_seconds += elapsed
+
+    def observe_template(self, name, elapsed):
+        self._check_fork()
+        with self._lock:
+            if name not in self.templates:
+                self.templates[name] = Histogram(LATENCY_BUCKETS)
+            self.templates[name].observe(elapsed)
+
+    def render(self, extra=()):
+        self._check_fork()
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def histograms(name, label, series):
+            for key, hist in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(hist.buckets + ('+Inf',), hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label}="{_metric_label(key)}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label}="{_metric_label(key)}"}} {hist.total:.6f}')
+                lines.append(f'{name}_count{{{label}="{_metric_label(key)}"}} {hist.count}')
+
+        with self._lock:
+            family('blog_http_requests_total', 'counter', 'Requests handled, by route, method and status.')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'blog_http_requests_total{{endpoint="{_metric_label(endpoint)}",'
+                             f'method="{method}",status="{status}"}} {count}')
+            family('blog_http_request_duration_seconds', 'histogram', 'Request wall time by route.')
+            histograms('blog_http_request_duration_seconds', 'endpoint', self.latency)
+            family('blog_http_request_duration_quantile_seconds', 'gauge',
+                   f'Request time quantiles by route over the last {METRICS_WINDOW} requests.')
+            for endpoint, hist in sorted(self.latency.items()):
+                for q, value in hist.quantiles().items():
+                    lines.append(f'blog_http_request_duration_quantile_seconds{{endpoint="{_metric_label(endpoint)}",'
+                                 f'quantile="{q}"}} {value:.6f}')
+            family('blog_http_request_queries', 'histogram', 'SQL statements executed per request, by route.')
+            histograms('blog_http_request_queries', 'endpoint', self.queries)
+            family('blog_http_request_sql_seconds_total', 'counter', 'Time spent in SQLite during requests, by route.')
+            for endpoint, seconds in sorted(self.request_sql_seconds.items()):
+                lines.append(f'blog_http_request_sql_seconds_total{{endpoint="{_metric_label(endpoint)}"}} {seconds:.6f}')
+            family('blog_sql_queries_total', 'counter', 'SQL statements executed, including background work.')
+            lines.append(f'blog_sql_queries_total {self.sql_count}')
+            family('blog_sql_seconds_total', 'counter', 'Time spent in SQLite, including background work.')
+            lines.append(f'blog_sql_seconds_total {self.sql_seconds:.6f}')
+            family('blog_template_render_duration_seconds', 'histogram', 'Jinja render time by template.')
+            histograms('blog_template_render_duration_seconds', 'template', self.templates)
+            family('blog_process_start_time_seconds', 'gauge', 'Start of this process (metrics are per process).')
+            lines.append(f'blog_process_start_time_seconds{{pid="{self._pid}"}} {self.started_at:.3f}')
+
+        for name, kind, help_text, samples in extra:
+            family(name, kind, help_text)
+            for labels, value in samples:
+                lines.append(f'{name}{labels} {value}')
+        return '\n'.join(lines) + '\n'
+
+def _metric_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+metrics = Metrics()
+
+def _record_sql(statements, elapsed):
+    timer = getattr(_request_local, 'timer', None)
+    if timer is not None:
+        timer.sql_count += statements
+        timer.sql_seconds += elapsed
+    else:
+        metrics.observe_sql(statements, elapsed)
+
+# Slow-query log. Every statement's calls and time are tallied by SQL text;
+# one that runs longer than SLOW_QUERY_MS (execute plus fetches) is recorded
+# with its parameter types and EXPLAIN QUERY PLAN, and full table scans in the
+# plan are flagged. Kept in memory per process, optionally appended to a file.
+QUERY_LOG_MAX_STATEMENTS = 1000  # distinct SQL strings tallied; later new ones are not
+QUERY_PLAN_SCAN_EXEMPT = ('USING INDEX', 'USING COVERING INDEX', 'USING INTEGER PRIMARY KEY',
+                          'USING PRIMARY KEY', 'VIRTUAL TABLE', 'CONSTANT ROW')
+
+class QueryStats:
+    __slots__ = ('calls', 'seconds', 'max_seconds', 'slow_calls', 'slow_seconds', 'plan', 'scans', 'params')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.slow_calls = 0
+        self.slow_seconds = 0.0
+        self.plan = None
+        self.scans = []
+        self.params = None
+
+class QueryLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.statements = {}
+        self.recent = deque(maxlen=app.config['SLOW_QUERY_LOG_SIZE'])
+
+    def observe(self, cursor, sql, elapsed, calls):
+        with self._lock:
+            stats = self.statements.get(sql)
+            if stats is None:
+                if len(self.statements) >= QUERY_LOG_MAX_STATEMENTS:
+                    return
+                stats = self.statements[sql] = QueryStats()
+            stats.calls += calls
+            stats.seconds += elapsed
+            if cursor._elapsed > stats.max_seconds:
+                stats.max_seconds = cursor._elapsed
+            event = cursor._slow_event
+            if event is not None:
+                # Rows fetched after the statement was logged still count towards it
+                stats.slow_seconds += elapsed
+                event['ms'] = round(cursor._elapsed * 1000, 2)
+                return
+            threshold = app.config['SLOW_QUERY_MS']
+            if not threshold or cursor._elapsed * 1000 < threshold:
+                return
+            stats.slow_calls += 1
+            stats.slow_seconds += cursor._elapsed
+            stats.params = _parameter_shape(cursor._parameters)
+            need_plan = stats.plan is None
+            if need_plan:
+                stats.plan = []  # claimed; other threads skip the EXPLAIN
+        if need_plan:
+            stats.plan = _explain_query_plan(cursor.connection, sql, cursor._parameters)
+            stats.scans = _plan_scans(stats.plan)
+        event = {
+            'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'ms': round(cursor._elapsed * 1000, 2),
+            'sql': ' '.join(sql.split()),
+            'params': stats.params,
+            'source': request.endpoint if has_request_context() else threading.current_thread().name,
+            'scans': stats.scans,
+        }
+        cursor._slow_event = event
+        with self._lock:
+            self.recent.append(event)
+        log_file = app.config['SLOW_QUERY_LOG_FILE']
+        if log_file:
+            try:
+                with open(log_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(dict(event, plan=stats.plan), ensure_ascii=False) + '\n')
+            except OSError as e:
+                print(f"Slow query log error: {e}")
+
+    def report(self, limit=50):
+        # Worst offenders first: the most time spent above the threshold
+        with self._lock:
+            slow = [(sql, stats) for sql, stats in self.statements.items() if stats.slow_calls]
+            recent = list(reversed(self.recent))
+        slow.sort(key=lambda item: item[1].slow_seconds, reverse=True)
+        offenders = [{
+            'sql': ' '.join(sql.split()),
+            'calls': stats.calls,
+            'slow_calls': stats.slow_calls,
+            'total_ms': round(stats.seconds * 1000, 1),
+            'avg_ms': round(stats.seconds * 1000 / stats.calls, 2) if stats.calls else 0.0,
+            'max_ms': round(stats.max_seconds * 1000, 2),
+            'params': stats.params,
+            'plan': stats.plan or [],
+            'scans': stats.scans,
+        } for sql, stats in slow[:limit]]
+        return {'offenders': offenders, 'recent': recent}
+
+    def slow_total(self):
+        return sum(stats.slow_calls for stats in self.statements.values())
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.recent.clear()
+
+query_log = QueryLog()
+
+def _parameter_shape(parameters):
+    # Types only: values may be passwords or post content
+    if parameters is None:
+        return '-'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + '}'
+    types = [type(value).__name__ for value in parameters]
+    if len(types) > 8:
+        return f"({', '.join(types[:8])}, ... {len(types)} parameters)"
+    return f"({', '.join(types)})"
+
+def _explain_query_plan(conn, sql, parameters):
+    # A plain cursor, so the EXPLAIN itself is neither timed nor logged
+    c = conn.cursor(sqlite3.Cursor)
+    try:
+        c.execute(f"EXPLAIN QUERY PLAN {sql}", () if parameters is None else parameters)
+        return [row[3] for row in c.fetchall()]
+    except sqlite3.Error as e:
+        return [f"(plan unavailable: {e})"]
+    finally:
+        c.close()
+
+def _plan_scans(plan):
+    # Full table scans, plus sorts that build a temporary b-tree for want of an index
+    return [detail for detail in plan
+            if (detail.startswith('SCAN') and not any(marker in detail for marker in QUERY_PLAN_SCAN_EXEMPT))
+            or detail.startswith('USE TEMP B-TREE')]
+
+# SQLite does most of a SELECT's work while rows are fetched, so fetches are
+# timed too and added to the statement time (but not counted as statements)
+class TimedCursor(sqlite3.Cursor):
+    _sql = None
+    _parameters = None
+    _elapsed = 0.0
+    _slow_event = None
+
+    def _executed(self, sql, parameters, elapsed):
+        _record_sql(1, elapsed)
+        self._sql, self._parameters, self._elapsed, self._slow_event = sql, parameters, elapsed, None
+        query_log.observe(self, sql, elapsed, 1)
+
+    def _fetched(self, elapsed):
+        _record_sql(0, elapsed)
+        if self._sql is not None:
+            self._elapsed += elapsed
+            query_log.observe(self, self._sql, elapsed, 0)
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._executed(sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            # Only lists expose their first row; it stands in for the parameter types
+            first = seq_of_parameters[0] if isinstance(seq_of_parameters, list) and seq_of_parameters else None
+            self._executed(sql, first, time.perf_counter() - start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._fetched(time.perf_counter() - start)
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._fetched(time.perf_counter() - start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._fetched(time.perf_counter() - start)
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # The shortcut methods create a plain cursor internally; route them through ours
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+# Registered before every other request hook so the timer covers them too
+@app.before_request
+def _start_request_timer():
+    if app.config['METRICS_ENABLED']:
+        _request_local.timer = RequestTimer()
+
+@app.after_request
+def _finish_request_timer(response):
+    # Registered first, so it runs after every other after_request handler
+    timer = getattr(_request_local, 'timer', None)
+    if timer is None:
+        return response
+    elapsed = time.perf_counter() - timer.start
+    metrics.observe_request(request.endpoint or 'unmatched', request.method, response.status_code, elapsed, timer)
+    response.headers['Server-Timing'] = timer.server_timing(elapsed, g.get('page_cache_result'))
+    return response
+
+@app.teardown_request
+def _clear_request_timer(exc):
+    _request_local.timer = None
+
+def _template_started(sender, template, context, **extra):
+    timer = getattr(_request_local, 'timer', None)
+    if timer is not None:
+        timer.template_starts.append(time.perf_counter())
+
+def _template_finished(sender, template, context, **extra):
+    timer = getattr(_request_local, 'timer', None)
+    if timer is None or not timer.template_starts:
+        return
+    elapsed = time.perf_counter() - timer.template_starts.pop()
+    if not timer.template_starts:  # nested renders are already inside the outer one
+        timer.template_seconds += elapsed
+    metrics.observe_template(template.name or '<string>', elapsed)
+
+before_render_template.connect(_template_started, app)
+template_rendered.connect(_template_finished, app)
+
+# Full-text search helpers. Indexed text is stripped of HTML and folded so that
+# Turkish letters match regardless of case and diacritics (İ/I/ı/i, ş/s, ğ/g ...).
+_SEARCH_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i', 'Î': 'i', 'î': 'i',
+    'Ş': 's', 'ş': 's', 'Ğ': 'g', 'ğ': 'g', 'Ç': 'c', 'ç': 'c',
+    'Ö': 'o', 'ö': 'o', 'Ü': 'u', 'ü': 'u', 'Â': 'a', 'â': 'a', 'Û': 'u', 'û': 'u',
+})
+_HTML_BLOCK_RE = re.compile(r'<(script|style)\b.*?</\1\s*>', re.S | re.I)
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
+def strip_html(html):
+    if not html:
+        return ''
+    text = _HTML_BLOCK_RE.sub(' ', html)
+    text = _HTML_TAG_RE.sub(' ', text)
+    return _WS_RE.sub(' ', html_lib.unescape(text)).strip()
+
+def fold_search_text(text):
+    if not text:
+        return ''
+    text = text.translate(_SEARCH_FOLD)
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Keep offsets aligned with the original so snippets can be highlighted
+        lowered = ''.join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+    return lowered
+
+def _fold_search_html(html):
+    return fold_search_text(strip_html(html))
+
+# The index is written from Python, not by triggers calling fts_fold(): a
+# trigger needing an application function would make every other SQLite
+# client (the sqlite3 shell, scripts) fail to write posts at all. Only
+# removals are left to built-in triggers, so a post trashed or deleted by any
+# client leaves search; a post written outside the app is indexed the next
+# time it is saved here, or by `flask rebuild-search-index`.
+def index_posts_for_search(c, post_ids=None):
+    # Migration 2 skips the table when SQLite lacks FTS5 and search() falls
+    # back to LIKE; any other error (busy, schema) fails the caller's write
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'")
+    if not c.fetchone():
+        return
+    if post_ids is None:
+        c.execute("DELETE FROM posts_fts")
+        c.execute("SELECT id, title, excerpt, content FROM posts WHERE is_deleted = 0")
+    else:
+        post_ids = list(post_ids)
+        if not post_ids:
+            return
+        marks = ','.join('?' * len(post_ids))
+        c.execute(f"DELETE FROM posts_fts WHERE rowid IN ({marks})", post_ids)
+        c.execute(f"SELECT id, title, excerpt, content FROM posts WHERE id IN ({marks}) AND is_deleted = 0",
+                  post_ids)
+    rows = [(row[0], fold_search_text(row[1]), fold_search_text(row[2]), _fold_search_html(row[3]))
+            for row in c.fetchall()]
+    c.executemany("INSERT INTO posts_fts (rowid, title, excerpt, content) VALUES (?, ?, ?, ?)", rows)
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    # Re-index every published post, e.g. after editing posts outside the app
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        index_posts_for_search(c)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    print(f"[OK] Indexed {get_counter(c, 'published_posts')} published posts")
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -41,17 +662,20 @@ def _setup_app():
         pass
     try:
         init_db()
-    except Exception:
-        pass
+    except Exception as e:
+        print(f"Database initialization error: {e}")
 
-# Run setup immediately at import time so WSGI servers are safe
-_setup_app()
+# Schema migrations. Each step runs once, in its own transaction, and records
+# its number in PRAGMA user_version; add new steps to the end of MIGRATIONS.
+def _table_columns(c, table):
+    c.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in c.fetchall()}
 
-# Database initialization
-def init_db():
-    conn = sqlite3.connect('blog.db')
-    c = conn.cursor()
-    
+def _add_column_if_missing(c, table, column, decl):
+    if column not in _table_columns(c, table):
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+def _migrate_base_schema(c):
     # Create tables
     c.execute('''CREATE TABLE IF NOT EXISTS posts (
                   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -70,7 +694,8 @@ def init_db():
     c.execute('''CREATE TABLE IF NOT EXISTS admin_users (
                   id INTEGER PRIMARY KEY AUTOINCREMENT,
                   username TEXT UNIQUE NOT NULL,
-                  password_hash TEXT NOT NULL)''')
+                  password_hash TEXT NOT NULL,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
     
     c.execute('''CREATE TABLE IF NOT EXISTS media_files (
                   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -111,40 +736,26 @@ def init_db():
                   deleted_at TIMESTAMP,
                   FOREIGN KEY (post_id) REFERENCES posts (id) ON DELETE CASCADE
     )''')
-    
-    # Add soft-delete columns if missing (idempotent)
-    for table in ['posts', 'favorites', 'favorite_images', 'post_images']:
-        try:
-            c.execute(f"ALTER TABLE {table} ADD COLUMN is_deleted INTEGER DEFAULT 0")
-        except sqlite3.OperationalError:
-            pass
-        try:
-            c.execute(f"ALTER TABLE {table} ADD COLUMN deleted_at TIMESTAMP")
-        except sqlite3.OperationalError:
-            pass
 
-    # media table is created in admin_media route as 'media'; ensure columns exist as well
-    try:
-        c.execute('''CREATE TABLE IF NOT EXISTS media (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        filename TEXT NOT NULL,
-        original_name TEXT NOT NULL,
-        file_path TEXT NOT NULL,
-        file_size INTEGER,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        is_deleted INTEGER DEFAULT 0,
-        deleted_at TIMESTAMP
-    )''')
-    except sqlite3.OperationalError:
-        pass
-    try:
-        c.execute("ALTER TABLE media ADD COLUMN is_deleted INTEGER DEFAULT 0")
-    except sqlite3.OperationalError:
-        pass
-    try:
-        c.execute("ALTER TABLE media ADD COLUMN deleted_at TIMESTAMP")
-    except sqlite3.OperationalError:
-        pass
+    c.execute('''CREATE TABLE IF NOT EXISTS media (
+                  id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  filename TEXT NOT NULL,
+                  original_name TEXT NOT NULL,
+                  file_path TEXT NOT NULL,
+                  file_size INTEGER,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  is_deleted INTEGER DEFAULT 0,
+                  deleted_at TIMESTAMP)''')
+    
+    # Columns added after the first release; older databases may lack them
+    for table in ['posts', 'favorites', 'favorite_images', 'post_images', 'media']:
+        _add_column_if_missing(c, table, 'is_deleted', 'INTEGER DEFAULT 0')
+        _add_column_if_missing(c, table, 'deleted_at', 'TIMESTAMP')
+    _add_column_if_missing(c, 'favorites', 'image_filename', 'TEXT')
+    if 'created_at' not in _table_columns(c, 'admin_users'):
+        # ALTER TABLE cannot add a CURRENT_TIMESTAMP default; backfill instead
+        c.execute("ALTER TABLE admin_users ADD COLUMN created_at TIMESTAMP")
+        c.execute("UPDATE admin_users SET created_at = CURRENT_TIMESTAMP")
 
     # Check if admin user exists, if not create one
     c.execute("SELECT * FROM admin_users WHERE username = ?", ('admin',))
@@ -153,12 +764,6 @@ def init_db():
         c.execute("INSERT INTO admin_users (username, password_hash) VALUES (?, ?)",
                  ('admin', password_hash))
     
-    # Add missing column to favorites table if it doesn't exist
-    try:
-        c.execute("ALTER TABLE favorites ADD COLUMN image_filename TEXT")
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    
     # Do not drop or clear data; keep existing records intact
     
     # Insert default posts if none exist
@@ -219,46 +824,1222 @@ def init_db():
             c.execute("""INSERT INTO posts (title, excerpt, content, category) 
                         VALUES (?, ?, ?, ?)""",
                      (post['title'], post['excerpt'], post['content'], post['category']))
-    
+
+# FTS5 search index over published posts. rowid mirrors posts.id; soft-deleted
+# posts are removed from the index. Migration 13 moved writes to
+# index_posts_for_search(); the triggers created here are dropped there.
+def _migrate_search_index(c):
+    try:
+        c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+                      title, excerpt, content,
+                      tokenize = 'unicode61 remove_diacritics 2')''')
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: search() falls back to LIKE
+        return
+    c.execute('''CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts
+                 WHEN NEW.is_deleted = 0 BEGIN
+                     INSERT INTO posts_fts (rowid, title, excerpt, content)
+                     VALUES (NEW.id, fts_fold(NEW.title), fts_fold(NEW.excerpt), fts_fold_html(NEW.content));
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS posts_fts_au
+                 AFTER UPDATE OF title, excerpt, content, is_deleted ON posts BEGIN
+                     DELETE FROM posts_fts WHERE rowid = OLD.id;
+                     INSERT INTO posts_fts (rowid, title, excerpt, content)
+                     SELECT NEW.id, fts_fold(NEW.title), fts_fold(NEW.excerpt), fts_fold_html(NEW.content)
+                     WHERE NEW.is_deleted = 0;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+                     DELETE FROM posts_fts WHERE rowid = OLD.id;
+                 END''')
+    # Backfill posts written before the index existed
+    c.execute("SELECT COUNT(*) FROM posts_fts")
+    if c.fetchone()[0] == 0:
+        c.execute('''INSERT INTO posts_fts (rowid, title, excerpt, content)
+                     SELECT id, fts_fold(title), fts_fold(excerpt), fts_fold_html(content)
+                     FROM posts WHERE is_deleted = 0''')
+
+# Counters kept current by triggers so listings never need COUNT(*) scans
+def _migrate_counters(c):
+    # Covering index for the published listing, ordered the way index() pages it
+    c.execute("CREATE INDEX IF NOT EXISTS idx_posts_published ON posts (is_deleted, created_at DESC, id DESC)")
+    c.execute('''CREATE TABLE IF NOT EXISTS counters (
+                  name TEXT PRIMARY KEY,
+                  value INTEGER NOT NULL DEFAULT 0)''')
+    c.execute('''INSERT OR IGNORE INTO counters (name, value)
+                 SELECT 'published_posts', COUNT(*) FROM posts WHERE is_deleted=0''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS counters_posts_ai AFTER INSERT ON posts
+                 WHEN NEW.is_deleted = 0 BEGIN
+                     UPDATE counters SET value = value + 1 WHERE name = 'published_posts';
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS counters_posts_au AFTER UPDATE OF is_deleted ON posts
+                 WHEN (OLD.is_deleted = 0) != (NEW.is_deleted = 0) BEGIN
+                     UPDATE counters SET value = value + (CASE WHEN NEW.is_deleted = 0 THEN 1 ELSE -1 END)
+                     WHERE name = 'published_posts';
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS counters_posts_ad AFTER DELETE ON posts
+                 WHEN OLD.is_deleted = 0 BEGIN
+                     UPDATE counters SET value = value - 1 WHERE name = 'published_posts';
+                 END''')
+
+def get_counter(c, name):
+    c.execute("SELECT value FROM counters WHERE name = ?", (name,))
+    row = c.fetchone()
+    return row[0] if row else 0
+
+def get_counters(c, names):
+    c.execute(f"SELECT name, value FROM counters WHERE name IN ({','.join('?' * len(names))})", names)
+    values = dict.fromkeys(names, 0)
+    values.update({row[0]: row[1] for row in c.fetchall()})
+    return values
+
+def _migrate_child_indexes(c):
+    # Serve the per-parent image lookups and prefetch_children() from an index
+    c.execute("CREATE INDEX IF NOT EXISTS idx_post_images_parent ON post_images (post_id, is_deleted, display_order)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_favorite_images_parent ON favorite_images (favorite_id, is_deleted, display_order)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_favorites_listing ON favorites (is_deleted, display_order, created_at)")
+
+def _migrate_content_generation(c):
+    # Bumped by every admin write that changes public pages; see cached_page()
+    c.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('content_generation', 0)")
+
+def _migrate_content_updated_at(c):
+    # Unix time of the last public content change; Last-Modified for public pages
+    c.execute('''INSERT OR IGNORE INTO counters (name, value)
+                 SELECT 'content_updated_at',
+                        COALESCE(CAST(strftime('%s', MAX(updated_at)) AS INTEGER),
+                                 CAST(strftime('%s', 'now') AS INTEGER))
+                 FROM posts''')
+
+def _migrate_image_derivatives(c):
+    # One row per resized/re-encoded copy of an upload; variant 'original'
+    # records the source dimensions
+    c.execute('''CREATE TABLE IF NOT EXISTS image_derivatives (
+                  id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  image_filename TEXT NOT NULL,
+                  variant TEXT NOT NULL,
+                  format TEXT NOT NULL,
+                  filename TEXT NOT NULL,
+                  width INTEGER NOT NULL,
+                  height INTEGER NOT NULL,
+                  file_size INTEGER,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  UNIQUE (image_filename, variant, format))''')
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _migrate_blobs(c):
+    # One row per stored upload file, keyed by name. refcount counts the rows
+    # that point at it (post_images, favorite_images, legacy posts.image_filename),
+    # soft-deleted ones included since they can still be restored.
+    c.execute('''CREATE TABLE IF NOT EXISTS blobs (
+                  filename TEXT PRIMARY KEY,
+                  sha256 TEXT UNIQUE,
+                  size INTEGER,
+                  refcount INTEGER NOT NULL DEFAULT 0,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    for table, column in (('post_images', 'image_filename'), ('favorite_images', 'image_filename'), ('posts', 'image_filename')):
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS blobs_{table}_ai AFTER INSERT ON {table}
+                      WHEN NEW.{column} IS NOT NULL BEGIN
+                          UPDATE blobs SET refcount = refcount + 1 WHERE filename = NEW.{column};
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS blobs_{table}_ad AFTER DELETE ON {table}
+                      WHEN OLD.{column} IS NOT NULL BEGIN
+                          UPDATE blobs SET refcount = refcount - 1 WHERE filename = OLD.{column};
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS blobs_{table}_au AFTER UPDATE OF {column} ON {table}
+                      WHEN OLD.{column} IS NOT NEW.{column} BEGIN
+                          UPDATE blobs SET refcount = refcount - 1 WHERE filename = OLD.{column};
+                          UPDATE blobs SET refcount = refcount + 1 WHERE filename = NEW.{column};
+                      END''')
+    # Backfill the uuid-named uploads that predate content addressing
+    c.execute('''SELECT image_filename, COUNT(*) FROM (
+                     SELECT image_filename FROM post_images
+                     UNION ALL SELECT image_filename FROM favorite_images
+                     UNION ALL SELECT image_filename FROM posts WHERE image_filename IS NOT NULL)
+                 GROUP BY image_filename''')
+    for filename, refs in c.fetchall():
+        path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        sha256 = size = None
+        if os.path.isfile(path):
+            sha256, size = _file_sha256(path), os.path.getsize(path)
+            c.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,))
+            if c.fetchone():
+                sha256 = None  # an identical legacy file already claimed this hash
+        c.execute("INSERT OR IGNORE INTO blobs (filename, sha256, size, refcount) VALUES (?, ?, ?, ?)",
+                  (filename, sha256, size, refs))
+
+def _migrate_jobs(c):
+    # Persistent queue for TaskExecutor; times are unix seconds
+    c.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                  id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  kind TEXT NOT NULL,
+                  payload TEXT NOT NULL DEFAULT '{}',
+                  status TEXT NOT NULL DEFAULT 'pending',
+                  attempts INTEGER NOT NULL DEFAULT 0,
+                  max_attempts INTEGER NOT NULL DEFAULT 5,
+                  run_after INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+                  locked_until INTEGER,
+                  last_error TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, run_after)")
+
+def _migrate_trash_indexes(c):
+    # Partial indexes: the trash listing and the retention sweep only ever
+    # look at soft-deleted rows, ordered or filtered by deleted_at
+    for table in ('posts', 'favorites', 'post_images', 'favorite_images'):
+        c.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_trash ON {table} (deleted_at) WHERE is_deleted = 1")
+
+def _migrate_posts_content_last(c):
+    # Rebuild posts with content as the last column. A row's columns are
+    # stored in order and a long value spills into overflow pages, so any
+    # column after content could only be read by walking content's overflow
+    # chain. With content last, listings that skip it never read those pages.
+    c.execute("PRAGMA table_info(posts)")
+    columns = [row[1] for row in c.fetchall()]
+    if columns[-1] == 'content':
+        return
+    c.execute("""SELECT sql FROM sqlite_master
+                 WHERE tbl_name = 'posts' AND type IN ('index', 'trigger') AND sql IS NOT NULL""")
+    dependents = [row[0] for row in c.fetchall()]
+    c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'posts'")
+    row = c.fetchone()
+    seq = row[0] if row else 0
+    c.execute('''CREATE TABLE posts_new (
+                  id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  title TEXT NOT NULL,
+                  excerpt TEXT,
+                  category TEXT,
+                  image_filename TEXT,
+                  image_class TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  views INTEGER DEFAULT 0,
+                  is_deleted INTEGER DEFAULT 0,
+                  deleted_at TIMESTAMP,
+                  content TEXT NOT NULL)''')
+    names = ('id, title, excerpt, category, image_filename, image_class, created_at, updated_at, '
+             'views, is_deleted, deleted_at, content')
+    c.execute(f"INSERT INTO posts_new ({names}) SELECT {names} FROM posts")
+    c.execute("DROP TABLE posts")  # drops its indexes and triggers too
+    c.execute("ALTER TABLE posts_new RENAME TO posts")
+    for sql in dependents:
+        c.execute(sql)
+    # Keep AUTOINCREMENT from reusing ids of posts deleted before the rebuild
+    c.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'posts'", (seq,))
+
+def _migrate_search_index_writes(c):
+    # Replace the triggers that called fts_fold()/fts_fold_html() with one that
+    # only uses built-in SQL; inserts and edits are indexed by the app
+    c.execute("DROP TRIGGER IF EXISTS posts_fts_ai")
+    c.execute("DROP TRIGGER IF EXISTS posts_fts_au")
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'")
+    if not c.fetchone():
+        return
+    c.execute('''CREATE TRIGGER IF NOT EXISTS posts_fts_trash AFTER UPDATE OF is_deleted ON posts
+                 WHEN NEW.is_deleted != 0 BEGIN
+                     DELETE FROM posts_fts WHERE rowid = OLD.id;
+                 END''')
+
+def _migrate_stats(c):
+    # Dashboard statistics kept current by triggers, so the dashboard reads a
+    # handful of rows instead of scanning posts:
+    #   counters: published_views, trashed_items, media_bytes
+    #   category_stats: published posts and their views per category
+    #   views_daily: views per post per day, written by ViewCounter.flush()
+    c.execute('''CREATE TABLE IF NOT EXISTS category_stats (
+                  category TEXT PRIMARY KEY,
+                  posts INTEGER NOT NULL DEFAULT 0,
+                  views INTEGER NOT NULL DEFAULT 0)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS views_daily (
+                  day TEXT NOT NULL,
+                  post_id INTEGER NOT NULL,
+                  views INTEGER NOT NULL DEFAULT 0,
+                  PRIMARY KEY (day, post_id)) WITHOUT ROWID''')
+
+    c.execute('''INSERT OR IGNORE INTO counters (name, value)
+                 SELECT 'published_views', COALESCE(SUM(views), 0) FROM posts WHERE is_deleted=0''')
+    c.execute('''INSERT OR IGNORE INTO category_stats (category, posts, views)
+                 SELECT COALESCE(category, ''), COUNT(*), COALESCE(SUM(views), 0)
+                 FROM posts WHERE is_deleted=0 GROUP BY COALESCE(category, '')''')
+    # A published post's views and category count toward the totals; a
+    # change of category, views or trash state moves its contribution
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_posts_ai AFTER INSERT ON posts
+                 WHEN NEW.is_deleted = 0 BEGIN
+                     UPDATE counters SET value = value + COALESCE(NEW.views, 0) WHERE name = 'published_views';
+                     INSERT INTO category_stats (category, posts, views)
+                     VALUES (COALESCE(NEW.category, ''), 1, COALESCE(NEW.views, 0))
+                     ON CONFLICT (category) DO UPDATE SET posts = posts + 1, views = views + excluded.views;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_posts_au AFTER UPDATE OF category, views, is_deleted ON posts BEGIN
+                     UPDATE counters
+                     SET value = value - (CASE WHEN OLD.is_deleted = 0 THEN COALESCE(OLD.views, 0) ELSE 0 END)
+                                       + (CASE WHEN NEW.is_deleted = 0 THEN COALESCE(NEW.views, 0) ELSE 0 END)
+                     WHERE name = 'published_views';
+                     UPDATE category_stats SET posts = posts - 1, views = views - COALESCE(OLD.views, 0)
+                     WHERE category = COALESCE(OLD.category, '') AND OLD.is_deleted = 0;
+                     INSERT INTO category_stats (category, posts, views)
+                     SELECT COALESCE(NEW.category, ''), 1, COALESCE(NEW.views, 0) WHERE NEW.is_deleted = 0
+                     ON CONFLICT (category) DO UPDATE SET posts = posts + 1, views = views + excluded.views;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_posts_ad AFTER DELETE ON posts
+                 WHEN OLD.is_deleted = 0 BEGIN
+                     UPDATE counters SET value = value - COALESCE(OLD.views, 0) WHERE name = 'published_views';
+                     UPDATE category_stats SET posts = posts - 1, views = views - COALESCE(OLD.views, 0)
+                     WHERE category = COALESCE(OLD.category, '');
+                 END''')
+
+    c.execute('''INSERT OR IGNORE INTO counters (name, value)
+                 SELECT 'trashed_items',
+                        (SELECT COUNT(*) FROM posts WHERE is_deleted=1)
+                      + (SELECT COUNT(*) FROM favorites WHERE is_deleted=1)
+                      + (SELECT COUNT(*) FROM post_images WHERE is_deleted=1)
+                      + (SELECT COUNT(*) FROM favorite_images WHERE is_deleted=1)''')
+    for table in ('posts', 'favorites', 'post_images', 'favorite_images'):
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS stats_{table}_trash_ai AFTER INSERT ON {table}
+                      WHEN NEW.is_deleted = 1 BEGIN
+                          UPDATE counters SET value = value + 1 WHERE name = 'trashed_items';
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS stats_{table}_trash_au AFTER UPDATE OF is_deleted ON {table}
+                      WHEN (OLD.is_deleted = 1) != (NEW.is_deleted = 1) BEGIN
+                          UPDATE counters SET value = value + (CASE WHEN NEW.is_deleted = 1 THEN 1 ELSE -1 END)
+                          WHERE name = 'trashed_items';
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS stats_{table}_trash_ad AFTER DELETE ON {table}
+                      WHEN OLD.is_deleted = 1 BEGIN
+                          UPDATE counters SET value = value - 1 WHERE name = 'trashed_items';
+                      END''')
+
+    # Uploaded originals plus their derivatives, in bytes
+    c.execute('''INSERT OR IGNORE INTO counters (name, value)
+                 SELECT 'media_bytes',
+                        (SELECT COALESCE(SUM(size), 0) FROM blobs)
+                      + (SELECT COALESCE(SUM(file_size), 0) FROM image_derivatives WHERE variant != 'original')''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_blobs_ai AFTER INSERT ON blobs BEGIN
+                     UPDATE counters SET value = value + COALESCE(NEW.size, 0) WHERE name = 'media_bytes';
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_blobs_au AFTER UPDATE OF size ON blobs BEGIN
+                     UPDATE counters SET value = value - COALESCE(OLD.size, 0) + COALESCE(NEW.size, 0)
+                     WHERE name = 'media_bytes';
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_blobs_ad AFTER DELETE ON blobs BEGIN
+                     UPDATE counters SET value = value - COALESCE(OLD.size, 0) WHERE name = 'media_bytes';
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_derivatives_ai AFTER INSERT ON image_derivatives
+                 WHEN NEW.variant != 'original' BEGIN
+                     UPDATE counters SET value = value + COALESCE(NEW.file_size, 0) WHERE name = 'media_bytes';
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_derivatives_ad AFTER DELETE ON image_derivatives
+                 WHEN OLD.variant != 'original' BEGIN
+                     UPDATE counters SET value = value - COALESCE(OLD.file_size, 0) WHERE name = 'media_bytes';
+                 END''')
+
+JOB_STATUSES = ('pending', 'running', 'done', 'failed')
+
+def _migrate_job_stats(c):
+    # Jobs per status in counters (jobs_pending, jobs_running, ...), so the
+    # dashboard and /metrics don't group the whole jobs table on every read
+    for status in JOB_STATUSES:
+        c.execute("INSERT OR IGNORE INTO counters (name, value) SELECT ?, COUNT(*) FROM jobs WHERE status = ?",
+                  (f'jobs_{status}', status))
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_jobs_ai AFTER INSERT ON jobs BEGIN
+                     UPDATE counters SET value = value + 1 WHERE name = 'jobs_' || NEW.status;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_jobs_au AFTER UPDATE OF status ON jobs
+                 WHEN NEW.status != OLD.status BEGIN
+                     UPDATE counters SET value = value - 1 WHERE name = 'jobs_' || OLD.status;
+                     UPDATE counters SET value = value + 1 WHERE name = 'jobs_' || NEW.status;
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS stats_jobs_ad AFTER DELETE ON jobs BEGIN
+                     UPDATE counters SET value = value - 1 WHERE name = 'jobs_' || OLD.status;
+                 END''')
+
+MIGRATIONS = [
+    (1, _migrate_base_schema),
+    (2, _migrate_search_index),
+    (3, _migrate_counters),
+    (4, _migrate_child_indexes),
+    (5, _migrate_content_generation),
+    (6, _migrate_content_updated_at),
+    (7, _migrate_image_derivatives),
+    (8, _migrate_blobs),
+    (9, _migrate_jobs),
+    (10, _migrate_trash_indexes),
+    (11, _migrate_posts_content_last),
+    (12, _migrate_stats),
+    (13, _migrate_search_index_writes),
+    (14, _migrate_job_stats),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+@contextmanager
+def _migration_lock():
+    # Serialize migrations across worker processes that start at the same time
+    lock_file = open(app.config['DATABASE'] + '.migrate.lock', 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+def _schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+# Database initialization
+def init_db():
+    conn = _connect()
+    try:
+        # Fast path for every worker once the schema is current
+        if _schema_version(conn) >= SCHEMA_VERSION:
+            return
+        with _migration_lock():
+            version = _schema_version(conn)
+            for number, migrate in MIGRATIONS:
+                if number <= version:
+                    continue
+                c = conn.cursor()
+                c.execute("BEGIN IMMEDIATE")
+                try:
+                    migrate(c)
+                    c.execute(f"PRAGMA user_version = {number}")
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+    finally:
+        conn.close()
+
+# Run setup immediately at import time so WSGI servers are safe
+_setup_app()
+
+# Batched child-row loading: fetch the images of a whole page of parents in one
+# query and group them in memory, instead of one query per parent (N+1).
+_CHILD_TABLES = {
+    'post_images': 'post_id',
+    'favorite_images': 'favorite_id',
+}
+_PREFETCH_CHUNK = 500  # stay well below SQLite's bound-parameter limit
+
+def prefetch_children(c, table, parent_ids, first_only=False):
+    fk = _CHILD_TABLES[table]
+    grouped = {pid: [] for pid in parent_ids}
+    ids = list(grouped)
+    for i in range(0, len(ids), _PREFETCH_CHUNK):
+        chunk = ids[i:i + _PREFETCH_CHUNK]
+        marks = ','.join('?' * len(chunk))
+        if first_only:
+            c.execute(f"""SELECT * FROM (
+                              SELECT *, ROW_NUMBER() OVER (PARTITION BY {fk} ORDER BY display_order, id) AS rn
+                              FROM {table} WHERE {fk} IN ({marks}) AND is_deleted=0)
+                          WHERE rn = 1""", chunk)
+        else:
+            c.execute(f"""SELECT * FROM {table} WHERE {fk} IN ({marks}) AND is_deleted=0
+                          ORDER BY {fk}, display_order, id""", chunk)
+        for row in c.fetchall():
+            grouped[row[fk]].append(row)
+    return grouped
+
+# Image pipeline: each upload gets resized WebP copies plus a JPEG (or PNG, when
+# the image has transparency) fallback at the IMAGE_VARIANTS widths, so pages
+# can offer a srcset instead of the full-size original.
+def generate_image_derivatives(c, filename):
+    rows = render_image_derivatives(filename)
+    if rows:
+        store_image_derivatives(c, filename, rows)
+    return rows
+
+def render_image_derivatives(filename):
+    # Writes the files only; slow, so callers run it outside any transaction
+    if Image is None:
+        return []
+    src = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    try:
+        size = os.path.getsize(src)
+        with Image.open(src) as im:
+            if getattr(im, 'is_animated', False):
+                return []  # resizing would drop the animation
+            im = ImageOps.exif_transpose(im)
+            has_alpha = im.mode in ('RGBA', 'LA', 'PA') or (im.mode == 'P' and 'transparency' in im.info)
+            im = im.convert('RGBA' if has_alpha else 'RGB')
+    except (OSError, Image.DecompressionBombError) as e:
+        print(f"Image derivative error for {filename}: {e}")
+        return []
+
+    out_dir = os.path.join(app.config['UPLOAD_FOLDER'], app.config['DERIVED_IMAGES_SUBDIR'])
+    os.makedirs(out_dir, exist_ok=True)
+    stem = filename.rsplit('.', 1)[0]
+    fallback = ('png', 'PNG', {'optimize': True}) if has_alpha else \
+               ('jpg', 'JPEG', {'quality': IMAGE_JPEG_QUALITY, 'optimize': True, 'progressive': True})
+    formats = [('webp', 'WEBP', {'quality': IMAGE_WEBP_QUALITY, 'method': 6}), fallback]
+
+    rows = [(filename, 'original', filename.rsplit('.', 1)[-1].lower(), filename, im.width, im.height, size)]
+    done_widths = set()
+    for variant, max_width in IMAGE_VARIANTS:
+        # Never upscale; a small original yields fewer variants
+        width = min(max_width, im.width)
+        if width in done_widths:
+            continue
+        done_widths.add(width)
+        height = max(1, round(im.height * width / im.width))
+        resized = im if width == im.width else im.resize((width, height), Image.LANCZOS)
+        for ext, pil_format, options in formats:
+            rel = f"{app.config['DERIVED_IMAGES_SUBDIR']}/{stem}.{variant}.{ext}"
+            out_path = os.path.join(app.config['UPLOAD_FOLDER'], rel)
+            resized.save(out_path, pil_format, **options)
+            rows.append((filename, variant, ext, rel, width, height, os.path.getsize(out_path)))
+    return rows
+
+def store_image_derivatives(c, filename, rows):
+    # Delete + insert rather than INSERT OR REPLACE, which would skip the
+    # delete triggers that keep the media_bytes counter in step
+    c.execute("DELETE FROM image_derivatives WHERE image_filename = ?", (filename,))
+    c.executemany("""INSERT INTO image_derivatives
+                     (image_filename, variant, format, filename, width, height, file_size)
+                     VALUES (?, ?, ?, ?, ?, ?, ?)""", rows)
+
+def unlink_image_derivatives(rows):
+    # Files written by render_image_derivatives() that will never get their rows
+    for row in rows:
+        if row[1] == 'original':
+            continue
+        try:
+            os.remove(os.path.join(app.config['UPLOAD_FOLDER'], row[3]))
+        except OSError:
+            pass
+
+def load_image_derivatives(c, filenames):
+    # {filename: {'width', 'height', 'webp': [...], 'fallback': [...]}} for a
+    # page of images in one query; entries are (path under images/, width)
+    names = list({f for f in filenames if f})
+    result = {}
+    for i in range(0, len(names), _PREFETCH_CHUNK):
+        chunk = names[i:i + _PREFETCH_CHUNK]
+        c.execute(f"""SELECT image_filename, variant, format, filename, width, height
+                      FROM image_derivatives WHERE image_filename IN ({','.join('?' * len(chunk))})
+                      ORDER BY width""", chunk)
+        for row in c.fetchall():
+            info = result.setdefault(row['image_filename'], {'webp': [], 'fallback': []})
+            if row['variant'] == 'original':
+                info['width'], info['height'] = row['width'], row['height']
+            elif row['format'] == 'webp':
+                info['webp'].append((row['filename'], row['width']))
+            else:
+                info['fallback'].append((row['filename'], row['width']))
+    return {name: info for name, info in result.items() if info['webp'] and 'width' in info}
+
+def remove_upload(c, filename):
+    # Delete an uploaded file together with its derivatives
+    if not filename:
+        return
+    c.execute("SELECT filename FROM image_derivatives WHERE image_filename=? AND variant != 'original'", (filename,))
+    paths = [row[0] for row in c.fetchall()] + [filename]
+    for rel in paths:
+        fp = os.path.join(app.config['UPLOAD_FOLDER'], rel)
+        if os.path.exists(fp):
+            try:
+                os.remove(fp)
+            except Exception:
+                pass
+    c.execute("DELETE FROM image_derivatives WHERE image_filename=?", (filename,))
+
+def spool_upload(file):
+    # Stream an upload to a temp file in the upload folder, hashing it on the
+    # way. Call before opening the write transaction so the writer lock is not
+    # held while the request body is copied to disk.
+    ext = file.filename.rsplit('.', 1)[1].lower()
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=app.config['UPLOAD_FOLDER'], prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return {'tmp_path': tmp_path, 'sha256': digest.hexdigest(), 'size': size, 'ext': ext}
+
+def discard_spooled(spooled):
+    for upload in spooled:
+        if os.path.exists(upload['tmp_path']):
+            os.remove(upload['tmp_path'])
+
+def store_upload(c, upload):
+    # Content-addressed storage: keep a spooled upload as <sha256>.<ext>, or
+    # reuse the stored file (and its derivatives) when the same bytes are
+    # already there. Returns the filename to reference. Call inside a write
+    # transaction so the rename and blobs row are serialized against the
+    # remove_uploads task.
+    c.execute("SELECT filename FROM blobs WHERE sha256 = ?", (upload['sha256'],))
+    row = c.fetchone()
+    filename = row[0] if row else f"{upload['sha256']}.{upload['ext']}"
+    path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if os.path.exists(path):
+        os.remove(upload['tmp_path'])
+    else:
+        os.replace(upload['tmp_path'], path)
+    if not row:
+        c.execute("INSERT OR IGNORE INTO blobs (filename, sha256, size) VALUES (?, ?, ?)",
+                  (filename, upload['sha256'], upload['size']))
+        enqueue_task(c, 'derive_images', {'filename': filename})
+    return filename
+
+def release_uploads(c, filenames):
+    # Call after deleting the referencing rows; files nothing points at any
+    # more are unlinked in the background (see the remove_uploads task)
+    names = list({f for f in filenames if f})
+    orphaned = []
+    for i in range(0, len(names), _PREFETCH_CHUNK):
+        chunk = names[i:i + _PREFETCH_CHUNK]
+        c.execute(f"SELECT filename FROM blobs WHERE refcount > 0 AND filename IN ({','.join('?' * len(chunk))})", chunk)
+        live = {row[0] for row in c.fetchall()}
+        orphaned.extend(name for name in chunk if name not in live)
+    if orphaned:
+        enqueue_task(c, 'remove_uploads', {'filenames': orphaned})
+    return len(orphaned)
+
+@app.cli.command('derive-images')
+def derive_images_command():
+    # Backfill derivatives for uploads made before the pipeline existed
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("""SELECT image_filename FROM post_images
+                 UNION SELECT image_filename FROM favorite_images
+                 UNION SELECT image_filename FROM posts WHERE image_filename IS NOT NULL
+                 EXCEPT SELECT image_filename FROM image_derivatives""")
+    pending = [row[0] for row in c.fetchall()]
+    for filename in pending:
+        if os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], filename)):
+            rows = generate_image_derivatives(c, filename)
+            conn.commit()
+            print(f"[OK] {filename}: {max(len(rows) - 1, 0)} derivatives")
+    content_changed(c)
     conn.commit()
-    conn.close()
+
+# Write-behind view counter. post_detail() only bumps an in-memory delta; a
+# background thread folds the deltas into posts.views in a single transaction
+# every VIEW_FLUSH_INTERVAL seconds, or sooner once VIEW_FLUSH_THRESHOLD views
+# are pending. Deltas are additive, so each worker process flushing its own
+# counts keeps the totals exact.
+class ViewCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_total = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+
+    def _reset_after_fork(self):
+        # Counts buffered by the parent belong to the parent
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_total = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+
+    def hit(self, post_id):
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+        with self._lock:
+            self._pending[post_id] = self._pending.get(post_id, 0) + 1
+            self._pending_total += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+                self._thread.start()
+            if self._pending_total >= app.config['VIEW_FLUSH_THRESHOLD']:
+                self._wake.set()
+
+    def pending(self, post_id):
+        return self._pending.get(post_id, 0)
+
+    def pending_total(self):
+        return self._pending_total
+
+    def _run(self):
+        while True:
+            self._wake.wait(app.config['VIEW_FLUSH_INTERVAL'])
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"View counter flush failed: {e}")
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            self._pending_total = 0
+        conn = get_db()
+        try:
+            with conn:
+                conn.executemany("UPDATE posts SET views = views + ? WHERE id = ? AND is_deleted=0",
+                                 [(delta, post_id) for post_id, delta in batch.items()])
+                # Daily rollup for the dashboard chart (UTC days, like CURRENT_TIMESTAMP).
+                # Only live posts get a row, whatever ids ended up buffered.
+                conn.executemany("""INSERT INTO views_daily (day, post_id, views)
+                                    SELECT date('now'), ?, ? WHERE EXISTS (SELECT 1 FROM posts WHERE id = ? AND is_deleted=0)
+                                    ON CONFLICT (day, post_id) DO UPDATE SET views = views + excluded.views""",
+                                 [(post_id, delta, post_id) for post_id, delta in batch.items()])
+        except Exception:
+            # Put the counts back so the next flush retries them
+            with self._lock:
+                for post_id, delta in batch.items():
+                    self._pending[post_id] = self._pending.get(post_id, 0) + delta
+                    self._pending_total += delta
+            raise
+        return sum(batch.values())
+
+view_counter = ViewCounter()
+
+def _flush_views_at_exit():
+    if view_counter._pid == os.getpid():
+        try:
+            view_counter.flush()
+        except Exception as e:
+            print(f"View counter flush failed: {e}")
+
+# Registered after close_db_pool so it runs first (atexit is LIFO)
+atexit.register(_flush_views_at_exit)
+
+# Background tasks. Slow work triggered by admin requests (image processing,
+# unlinking files, backups) is queued in the jobs table inside the request's
+# own transaction and run by a small pool of worker threads, so the request
+# commits quickly and never holds the writer lock for it. Jobs survive
+# restarts: a job whose worker died is picked up again once its lease
+# expires, and failures are retried with exponential backoff.
+TASK_HANDLERS = {}
+TASK_SCHEDULE = {}  # kind -> seconds between runs of a periodic task
+
+def task(kind, every=None):
+    def register(func):
+        TASK_HANDLERS[kind] = func
+        if every:
+            TASK_SCHEDULE[kind] = every
+        return func
+    return register
+
+def enqueue_task(c, kind, payload=None, max_attempts=None, delay=0):
+    # Runs after the caller commits; call task_executor.wake() then
+    c.execute("""INSERT INTO jobs (kind, payload, max_attempts, run_after)
+                 VALUES (?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER) + ?)""",
+              (kind, json.dumps(payload or {}), max_attempts or app.config['TASK_MAX_ATTEMPTS'], delay))
+    return c.lastrowid
+
+class TaskExecutor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+        self._pid = os.getpid()
+
+    def start(self):
+        if self._pid != os.getpid():
+            # Worker threads do not survive fork; the child starts its own
+            self._lock = threading.Lock()
+            self._wake = threading.Event()
+            self._threads = []
+            self._pid = os.getpid()
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(app.config['TASK_WORKERS']):
+                thread = threading.Thread(target=self._run, name=f'task-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            try:
+                self._schedule_periodic()
+            except sqlite3.Error as e:
+                print(f"Scheduling periodic tasks failed: {e}")
+
+    def _schedule_periodic(self):
+        # Make sure every periodic task has one queued run; each run queues
+        # the next one when it finishes (see run_next())
+        conn = get_db()
+        with conn:
+            for kind in TASK_SCHEDULE:
+                conn.execute("""INSERT INTO jobs (kind, max_attempts)
+                                SELECT ?, ? WHERE NOT EXISTS (
+                                    SELECT 1 FROM jobs WHERE kind=? AND status IN ('pending', 'running'))""",
+                             (kind, app.config['TASK_MAX_ATTEMPTS'], kind))
+
+    def wake(self):
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                ran = self.run_next()
+            except Exception as e:
+                print(f"Task worker error: {e}")
+                ran = False
+            if not ran:
+                self._wake.wait(app.config['TASK_POLL_INTERVAL'])
+                self._wake.clear()
+
+    def _claim(self):
+        conn = get_db()
+        with conn:
+            rows = conn.execute("""
+                UPDATE jobs SET status='running', attempts=attempts + 1, updated_at=CURRENT_TIMESTAMP,
+                       locked_until=CAST(strftime('%s', 'now') AS INTEGER) + ?
+                WHERE id = (SELECT id FROM jobs
+                            WHERE (status='pending' AND run_after <= CAST(strftime('%s', 'now') AS INTEGER))
+                               OR (status='running' AND locked_until < CAST(strftime('%s', 'now') AS INTEGER))
+                            ORDER BY id LIMIT 1)
+                RETURNING id, kind, payload, attempts, max_attempts""",
+                (app.config['TASK_LEASE_SECONDS'],)).fetchall()
+        return rows[0] if rows else None
+
+    def run_next(self):
+        # Claim and run one due job; False when the queue is idle
+        job = self._claim()
+        if job is None:
+            return False
+        conn = get_db()
+        try:
+            handler = TASK_HANDLERS.get(job['kind'])
+            if handler is None:
+                raise LookupError(f"No handler for task '{job['kind']}'")
+            handler(json.loads(job['payload']))
+        except Exception as e:
+            conn.rollback()
+            print(f"Task {job['id']} ({job['kind']}) failed on attempt {job['attempts']}: {e}")
+            with conn:
+                if job['attempts'] >= job['max_attempts']:
+                    conn.execute("""UPDATE jobs SET status='failed', last_error=?, locked_until=NULL,
+                                    updated_at=CURRENT_TIMESTAMP WHERE id=?""", (str(e), job['id']))
+                    self._reschedule(conn, job['kind'])
+                else:
+                    delay = app.config['TASK_RETRY_DELAY'] * 2 ** (job['attempts'] - 1)
+                    conn.execute("""UPDATE jobs SET status='pending', last_error=?, locked_until=NULL,
+                                    run_after=CAST(strftime('%s', 'now') AS INTEGER) + ?,
+                                    updated_at=CURRENT_TIMESTAMP WHERE id=?""", (str(e), delay, job['id']))
+        else:
+            with conn:
+                conn.execute("""UPDATE jobs SET status='done', last_error=NULL, locked_until=NULL,
+                                updated_at=CURRENT_TIMESTAMP WHERE id=?""", (job['id'],))
+                self._reschedule(conn, job['kind'])
+        return True
+
+    def _reschedule(self, conn, kind):
+        if kind in TASK_SCHEDULE:
+            enqueue_task(conn.cursor(), kind, delay=TASK_SCHEDULE[kind])
+
+    def stats(self, c, recent=10):
+        # Per-status totals are trigger-maintained (see _migrate_job_stats).
+        # Pending jobs that are not due yet (periodic runs, retries in backoff)
+        # are counted as scheduled; that range is read from idx_jobs_queue.
+        totals = get_counters(c, [f'jobs_{status}' for status in JOB_STATUSES])
+        counts = {status: totals[f'jobs_{status}'] for status in JOB_STATUSES}
+        c.execute("""SELECT COUNT(*) FROM jobs
+                     WHERE status='pending' AND run_after > CAST(strftime('%s', 'now') AS INTEGER)""")
+        counts['scheduled'] = c.fetchone()[0]
+        counts['pending'] -= counts['scheduled']
+        # Done jobs never have last_error set, so the status filter keeps
+        # this on idx_jobs_queue instead of scanning the finished history
+        c.execute("""SELECT id, kind, status, attempts, max_attempts, last_error, updated_at
+                     FROM jobs WHERE status IN ('pending', 'running', 'failed')
+                        AND (status != 'pending' OR last_error IS NOT NULL
+                             OR run_after <= CAST(strftime('%s', 'now') AS INTEGER))
+                     ORDER BY id DESC LIMIT ?""", (recent,))
+        return {'counts': counts, 'recent': c.fetchall(), 'workers': len(self._threads)}
+
+task_executor = TaskExecutor()
+
+@app.before_request
+def _start_task_workers():
+    # Also resumes jobs left over from before a restart
+    task_executor.start()
+
+@task('derive_images')
+def _derive_images_task(payload):
+    conn = get_db()
+    c = conn.cursor()
+    filename = payload['filename']
+    c.execute("SELECT 1 FROM blobs WHERE filename=?", (filename,))
+    if not c.fetchone():
+        return  # released before we got to it
+    rows = render_image_derivatives(filename)
+    if not rows:
+        return
+    # A remove_uploads job may have released the blob while we were resizing;
+    # check again under the writer lock, which that job also takes
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        c.execute("SELECT 1 FROM blobs WHERE filename=?", (filename,))
+        if c.fetchone():
+            store_image_derivatives(c, filename, rows)
+            content_changed(c)
+            conn.commit()
+            return
+        conn.rollback()
+    except Exception:
+        conn.rollback()
+        raise
+    unlink_image_derivatives(rows)
+
+@task('prune_jobs', every=app.config['TASK_PRUNE_INTERVAL'])
+def _prune_jobs_task(payload):
+    # Every upload and periodic run leaves a job row behind; drop the old
+    # finished ones so the queue and its stats stay small
+    conn = get_db()
+    with conn:
+        deleted = conn.execute("""DELETE FROM jobs WHERE status='done' AND updated_at < datetime('now', ?)""",
+                               (f"-{app.config['TASK_HISTORY_DAYS']} days",)).rowcount
+    if deleted:
+        print(f"Task history: pruned {deleted} finished jobs")
+
+REMOVE_UPLOADS_BATCH = 100
+
+@task('remove_uploads')
+def _remove_uploads_task(payload):
+    conn = get_db()
+    c = conn.cursor()
+    filenames = payload['filenames']
+    # Short transactions so a large purge does not hold the writer lock for long
+    for i in range(0, len(filenames), REMOVE_UPLOADS_BATCH):
+        # Take the writer lock first so an upload of the same bytes cannot
+        # re-reference a file between the check and the unlink
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            for filename in filenames[i:i + REMOVE_UPLOADS_BATCH]:
+                c.execute("SELECT refcount FROM blobs WHERE filename=?", (filename,))
+                row = c.fetchone()
+                if row is None or row[0] <= 0:
+                    remove_upload(c, filename)
+                    c.execute("DELETE FROM blobs WHERE filename=?", (filename,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+@task('backup')
+def _backup_task(payload):
+    script = os.path.join(app.root_path, 'scripts', 'backup.py')
+    # Hand over the database this process uses; a relative BLOG_DB would
+    # otherwise resolve against whatever directory the worker started in
+    env = dict(os.environ, BLOG_DB=os.path.abspath(app.config['DATABASE']))
+    result = subprocess.run([sys.executable, script], capture_output=True, text=True, timeout=3600,
+                            cwd=app.root_path, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip()[-500:] or f"backup.py exited with {result.returncode}")
+
+# Rendered-page cache for public routes. Entries are tagged with the content
+# generation they were rendered at; admin writes bump the generation in the
+# counters table (see content_changed()), which invalidates the cache in every
+# worker process on its next request.
+class PageCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, generation, body):
+        with self._lock:
+            self._entries[key] = (generation, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > app.config['PAGE_CACHE_MAX_ENTRIES']:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(100.0 * self.hits / lookups, 1) if lookups else 0.0,
+        }
+
+page_cache = PageCache()
+
+def content_changed(c):
+    # Call inside the admin write transaction, before commit
+    c.execute("UPDATE counters SET value = value + 1 WHERE name = 'content_generation'")
+    c.execute("UPDATE counters SET value = CAST(strftime('%s', 'now') AS INTEGER) WHERE name = 'content_updated_at'")
+    page_cache.clear()
+    published_content.invalidate()
+
+# Fingerprint of the deployed templates and code, folded into public ETags so a
+# deploy invalidates browser caches even when no content changed
+def _compute_build_id():
+    h = hashlib.sha1()
+    paths = [os.path.abspath(__file__)]
+    for root, _dirs, files in os.walk(os.path.join(app.root_path, 'templates')):
+        paths.extend(os.path.join(root, name) for name in files)
+    for path in sorted(paths):
+        try:
+            h.update(f"{path}:{os.stat(path).st_mtime_ns}".encode())
+        except OSError:
+            pass
+    return h.hexdigest()[:12]
+
+BUILD_ID = _compute_build_id()
+
+def cached_page(on_hit=None, exists=None, shows_views=False):
+    # exists(snapshot, **kwargs) says whether the URL names a live resource;
+    # when it does not, the view runs uncached and answers 404 or redirects
+    # itself, so missing or trashed pages never get a 304 or count a view.
+    # View flushes do not bump the content generation, so a page that prints
+    # view counts sets shows_views: its entries and ETag also carry the
+    # flushed view total, and it sends no Last-Modified (content_updated_at
+    # does not move with views). Other pages keep their counts out of the HTML.
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            # Pages carrying flash messages are one-off; render them normally
+            if session.get('_flashes'):
+                return view(**kwargs)
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            snapshot = g.content_snapshot = published_content.current()
+            if exists and not exists(snapshot, **kwargs):
+                g.page_cache_result = 'miss'
+                return view(**kwargs)
+            generation = snapshot.generation
+            if shows_views:
+                generation = f"{generation}.{snapshot.published_views}"
+                last_modified = None
+            else:
+                last_modified = datetime.fromtimestamp(snapshot.updated_at, timezone.utc)
+            etag = f"{BUILD_ID}-{generation}"
+            # Conditional GET: nothing changed since the client's copy
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                if on_hit:
+                    on_hit(**kwargs)
+                g.page_cache_result = 'not-modified'
+                response = make_response('', 304)
+            else:
+                body = page_cache.get(key, generation)
+                if body is not None:
+                    if on_hit:
+                        on_hit(**kwargs)
+                    g.page_cache_result = 'hit'
+                else:
+                    g.page_cache_result = 'miss'
+                    rv = view(**kwargs)
+                    # Only plain 200 HTML bodies are cached (not 404 tuples or redirects)
+                    if not isinstance(rv, str) or g.get('page_cache_skip'):
+                        return rv
+                    body = rv
+                    page_cache.set(key, generation, body)
+                response = make_response(body)
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            g.http_revalidate = True
+            return response
+        return wrapper
+    return decorator
 
 # Frontend Routes
+POSTS_PER_PAGE = 5
+
+# Listing pages render PostSummary records: every posts column except
+# content, plus per-listing extras. Compact immutable tuples, built once per
+# ContentSnapshot and shared by every page that lists them.
+POST_SUMMARY_FIELDS = ('id', 'title', 'excerpt', 'category', 'image_filename', 'image_class',
+                       'created_at', 'updated_at', 'views')
+PostSummary = namedtuple('PostSummary', POST_SUMMARY_FIELDS + ('first_image', 'snippet'), defaults=(None, None))
+
+def post_summary_columns(alias=None):
+    prefix = f"{alias}." if alias else ''
+    return ', '.join(prefix + name for name in POST_SUMMARY_FIELDS)
+
+def to_post_summaries(rows):
+    return [PostSummary(*row[:len(POST_SUMMARY_FIELDS)]) for row in rows]
+
+# Published-content snapshot. Public pages read posts, images, favorites and
+# image derivatives from an immutable in-memory copy of everything published,
+# with the lookups they need prebuilt, instead of querying SQLite per request.
+# Before serving, a request checks PRAGMA data_version on its own connection,
+# which changes only when another connection has committed and reads no table.
+# Only then are the counters read: a new content generation rebuilds the
+# snapshot, new view counts alone refresh just the views. Either way the new
+# snapshot replaces the old one in one assignment, so a request renders from a
+# single consistent copy. Posts are held as PostSummary records only; the
+# body of a post is read from SQLite when post_detail() or a search snippet
+# needs it, so the snapshot never keeps every post's content in memory.
+# Search still matches through the FTS index.
+SNAPSHOT_COUNTERS = ('content_generation', 'content_updated_at', 'published_views')
+
+class ContentSnapshot:
+    def __init__(self, counters, posts, images, favorites, derivatives):
+        self.generation = counters['content_generation']
+        self.updated_at = counters['content_updated_at']
+        self.published_views = counters['published_views']
+        self.images = images  # post id -> image rows in display order
+        self.favorites = favorites  # listing order, each with its 'images'
+        self.derivatives = derivatives  # every published image's srcset info
+        # Listing order, newest first, and each post's place in it (keyset paging)
+        by_date = sorted(posts, key=lambda post: (post.created_at or '', post.id), reverse=True)
+        self.by_date = tuple(post._replace(first_image=self.first_image(post.id)) for post in by_date)
+        self.posts = {post.id: post for post in self.by_date}
+        self.positions = {post.id: i for i, post in enumerate(self.by_date)}
+
+    def first_image(self, post_id):
+        images = self.images.get(post_id)
+        return images[0]['image_filename'] if images else None
+
+    def with_views(self, counters, views):
+        posts = [post._replace(views=views.get(post.id, post.views)) for post in self.by_date]
+        return ContentSnapshot(counters, posts, self.images, self.favorites, self.derivatives)
+
+def _group_rows(rows, key, parents):
+    grouped = {}
+    for row in rows:
+        if row[key] in parents:
+            grouped.setdefault(row[key], []).append(dict(row))
+    return grouped
+
+class PublishedContent:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.builds = 0
+        self.view_refreshes = 0
+
+    def current(self):
+        conn = get_db()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        snapshot = self._snapshot
+        if snapshot is not None and _db_local.data_version == data_version:
+            return snapshot
+        counters = get_counters(conn.cursor(), SNAPSHOT_COUNTERS)
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.generation != counters['content_generation']:
+                snapshot = self._snapshot = self._build(conn)
+            elif snapshot.published_views != counters['published_views']:
+                snapshot = self._snapshot = self._refresh_views(conn, snapshot)
+        _db_local.data_version = data_version
+        return snapshot
+
+    def invalidate(self):
+        # For writes on this thread's own connection, which data_version does not report
+        _db_local.data_version = None
+
+    @contextmanager
+    def _read_transaction(self, conn):
+        # One read transaction, so the counters describe exactly the rows read
+        conn.execute("BEGIN")
+        try:
+            yield conn.cursor()
+        finally:
+            conn.rollback()
+
+    def _build(self, conn):
+        with self._read_transaction(conn) as c:
+            counters = get_counters(c, SNAPSHOT_COUNTERS)
+            c.execute(f"SELECT {post_summary_columns()} FROM posts WHERE is_deleted=0")
+            posts = to_post_summaries(c.fetchall())
+            post_ids = {post.id for post in posts}
+            c.execute("SELECT * FROM post_images WHERE is_deleted=0 ORDER BY post_id, display_order, id")
+            images = _group_rows(c.fetchall(), 'post_id', post_ids)
+            c.execute("SELECT * FROM favorites WHERE is_deleted=0 ORDER BY display_order ASC, created_at DESC")
+            favorites = [dict(row) for row in c.fetchall()]
+            c.execute("SELECT * FROM favorite_images WHERE is_deleted=0 ORDER BY favorite_id, display_order, id")
+            favorite_images = _group_rows(c.fetchall(), 'favorite_id', {favorite['id'] for favorite in favorites})
+            for favorite in favorites:
+                favorite['images'] = favorite_images.get(favorite['id'], [])
+            filenames = [post.image_filename for post in posts]
+            filenames += [image['image_filename'] for rows in images.values() for image in rows]
+            filenames += [image['image_filename'] for rows in favorite_images.values() for image in rows]
+            derivatives = load_image_derivatives(c, filenames)
+        self.builds += 1
+        return ContentSnapshot(counters, posts, images, favorites, derivatives)
+
+    def _refresh_views(self, conn, snapshot):
+        with self._read_transaction(conn) as c:
+            counters = get_counters(c, SNAPSHOT_COUNTERS)
+            views = None
+            if counters['content_generation'] == snapshot.generation:
+                c.execute("SELECT id, views FROM posts WHERE is_deleted=0")
+                views = {row[0]: row[1] for row in c.fetchall()}
+        if views is None:
+            return self._build(conn)
+        self.view_refreshes += 1
+        return snapshot.with_views(counters, views)
+
+published_content = PublishedContent()
+
+def current_content():
+    # The snapshot cached_page() checked, so the page matches its ETag
+    snapshot = g.get('content_snapshot')
+    if snapshot is None:
+        snapshot = g.content_snapshot = published_content.current()
+    return snapshot
+
+def load_post_contents(c, post_ids):
+    # Bodies of published posts by id; the snapshot holds summaries only
+    post_ids = list(post_ids)
+    if not post_ids:
+        return {}
+    c.execute(f"SELECT id, content FROM posts WHERE is_deleted=0 AND id IN ({','.join('?' * len(post_ids))})",
+              post_ids)
+    return {row[0]: row[1] for row in c.fetchall()}
+
+def _page_of_posts(snapshot, page, after=None, before=None):
+    # Keyset pagination: next/previous links carry the id of the boundary post.
+    # A bare /page/<n> (e.g. a bookmark), or a boundary post that has since
+    # been unpublished, falls back to the page number.
+    posts = snapshot.by_date
+    if after in snapshot.positions:
+        start = snapshot.positions[after] + 1
+        return posts[start:start + POSTS_PER_PAGE], len(posts) > start + POSTS_PER_PAGE
+    if before in snapshot.positions:
+        end = snapshot.positions[before]
+        return posts[max(0, end - POSTS_PER_PAGE):end], True
+    start = (page - 1) * POSTS_PER_PAGE
+    return posts[start:start + POSTS_PER_PAGE], len(posts) > start + POSTS_PER_PAGE
+
 @app.route('/')
 @app.route('/page/<int:page>')
+@cached_page()
 def index(page=1):
     try:
-        posts_per_page = 5
-        offset = (page - 1) * posts_per_page
+        page = max(page, 1)
+        snapshot = current_content()
         
-        conn = sqlite3.connect('blog.db')
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        
-        # Get total posts count
-        c.execute("SELECT COUNT(*) FROM posts WHERE is_deleted=0")
-        total_posts = c.fetchone()[0]
-        
-        # Get posts for current page
-        c.execute("SELECT * FROM posts WHERE is_deleted=0 ORDER BY created_at DESC LIMIT ? OFFSET ?", 
-                 (posts_per_page, offset))
-        posts = c.fetchall()
-        
-        # Get images for each post
-        posts_with_images = []
-        for post in posts:
-            post_dict = dict(post)
-            c.execute("SELECT * FROM post_images WHERE post_id = ? AND is_deleted=0 ORDER BY display_order LIMIT 1", (post['id'],))
-            first_image = c.fetchone()
-            post_dict['first_image'] = first_image['image_filename'] if first_image else None
-            posts_with_images.append(post_dict)
-        
-        conn.close()
+        # Get posts for current page (first images are part of the snapshot)
+        posts, has_more = _page_of_posts(snapshot, page,
+                                         after=request.args.get('after', type=int),
+                                         before=request.args.get('before', type=int))
         
         # Calculate pagination info
-        total_pages = (total_posts + posts_per_page - 1) // posts_per_page
+        total_posts = len(snapshot.by_date)
+        total_pages = (total_posts + POSTS_PER_PAGE - 1) // POSTS_PER_PAGE
         has_prev = page > 1
-        has_next = page < total_pages
+        has_next = has_more
         
         pagination = {
             'page': page,
@@ -266,78 +2047,109 @@ def index(page=1):
             'has_prev': has_prev,
             'has_next': has_next,
             'prev_page': page - 1 if has_prev else None,
-            'next_page': page + 1 if has_next else None
+            'next_page': page + 1 if has_next else None,
+            'prev_cursor': posts[0].id if has_prev and posts else None,
+            'next_cursor': posts[-1].id if has_next and posts else None
         }
         
-        return render_template('index.html', posts=posts_with_images, pagination=pagination)
+        return render_template('index.html', posts=posts, pagination=pagination, derivatives=snapshot.derivatives)
     except Exception as e:
         print(f"Database error in index: {e}")
-        return render_template('index.html', posts=[], pagination=None)
+        g.page_cache_skip = True
+        return render_template('index.html', posts=[], pagination=None, derivatives={})
 
 @app.route('/post/<int:post_id>')
+@cached_page(on_hit=lambda post_id: view_counter.hit(post_id),
+             exists=lambda snapshot, post_id: post_id in snapshot.posts)
 def post_detail(post_id):
-    conn = sqlite3.connect('blog.db')
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
+    snapshot = current_content()
+    post = snapshot.posts.get(post_id)
+    content = load_post_contents(get_db().cursor(), [post_id]).get(post_id) if post else None
     
-    # Increment view count
-    c.execute("UPDATE posts SET views = views + 1 WHERE id = ?", (post_id,))
-    
-    # Get post
-    c.execute("SELECT * FROM posts WHERE id = ? AND is_deleted=0", (post_id,))
-    post = c.fetchone()
-    
-    if post:
-        # Get all images for this post
-        c.execute("SELECT * FROM post_images WHERE post_id = ? AND is_deleted=0 ORDER BY display_order", (post['id'],))
-        images = c.fetchall()
-        
-        conn.commit()
-        conn.close()
-        
-        return render_template('post_detail.html', post=post, images=images)
+    if content is not None:
+        # Count the view; it is written to the database in the next batch
+        view_counter.hit(post_id)
+        post = dict(post._asdict(), content=content, views=(post.views or 0) + view_counter.pending(post_id))
+        images = snapshot.images.get(post_id, [])
+        return render_template('post_detail.html', post=post, images=images, derivatives=snapshot.derivatives)
     else:
-        conn.close()
         return "Post not found", 404
 
 @app.route('/hakkimda')
+@cached_page()
 def about():
     return render_template('about.html')
 
 @app.route('/favoriler')
+@cached_page()
 def favorites():
-    conn = sqlite3.connect('blog.db')
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    
-    # Get all favorites
-    c.execute("SELECT * FROM favorites WHERE is_deleted=0 ORDER BY display_order ASC, created_at DESC")
-    favorites_list = c.fetchall()
-    
-    # Get images for each favorite
-    favorites_with_images = []
-    for favorite in favorites_list:
-        fav_dict = dict(favorite)
-        c.execute("SELECT * FROM favorite_images WHERE favorite_id = ? AND is_deleted=0 ORDER BY display_order", (fav_dict['id'],))
-        images = c.fetchall()
-        fav_dict['images'] = images
-        favorites_with_images.append(fav_dict)
-    
-    conn.close()
-    return render_template('favorites.html', favorites=favorites_with_images)
+    snapshot = current_content()
+    return render_template('favorites.html', favorites=snapshot.favorites, derivatives=snapshot.derivatives)
+
+SEARCH_RESULTS_LIMIT = 50
+SNIPPET_RADIUS = 90
+
+def _search_terms(query):
+    return re.findall(r'\w+', fold_search_text(query))
+
+def _search_snippet(text, terms):
+    # Highlight matches in the original text; fold_search_text keeps offsets aligned
+    folded = fold_search_text(text)
+    pattern = re.compile(r'\b(?:' + '|'.join(re.escape(t) for t in terms) + r')\w*')
+    first = pattern.search(folded)
+    if not first:
+        return None
+    start = max(0, first.start() - SNIPPET_RADIUS)
+    end = min(len(text), first.end() + SNIPPET_RADIUS)
+    parts = ['…' if start > 0 else '']
+    pos = start
+    for m in pattern.finditer(folded, start, end):
+        parts.append(escape(text[pos:m.start()]))
+        parts.append(Markup('<mark>%s</mark>') % text[m.start():m.end()])
+        pos = m.end()
+    parts.append(escape(text[pos:end]))
+    parts.append('…' if end < len(text) else '')
+    return Markup('').join(parts)
+
+def search_posts(c, snapshot, query, limit=SEARCH_RESULTS_LIMIT):
+    terms = _search_terms(query)
+    if not terms:
+        return []
+    # Every term must match, each as a word prefix; BM25 weights title > excerpt > content
+    match = ' '.join(f'"{t}"*' for t in terms)
+    try:
+        # Only the ranked ids come from SQLite; the posts come from the snapshot
+        c.execute("""SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?
+                     ORDER BY bm25(posts_fts, 10.0, 4.0, 1.0) LIMIT ?""", (match, limit))
+        ids = [row[0] for row in c.fetchall()]
+    except sqlite3.OperationalError:
+        # No FTS5 index available: plain substring search
+        needle = query.lower()
+        c.execute("SELECT id, content FROM posts WHERE is_deleted=0")
+        in_content = {row[0] for row in c if needle in (row[1] or '').lower()}
+        ids = [post.id for post in snapshot.by_date
+               if post.id in in_content
+               or any(needle in (text or '').lower() for text in (post.title, post.excerpt))][:limit]
+    contents = load_post_contents(c, ids)
+    results = []
+    for post_id in ids:
+        # Skip hits the snapshot has not caught up with yet
+        i = snapshot.positions.get(post_id)
+        if i is None:
+            continue
+        post = snapshot.by_date[i]
+        snippet = _search_snippet(strip_html(contents.get(post_id) or ''), terms) or _search_snippet(post.excerpt or '', terms)
+        results.append(post._replace(snippet=snippet))
+    return results
 
 @app.route('/search')
+@cached_page(exists=lambda snapshot: bool(request.args.get('q', '').strip()), shows_views=True)
 def search():
-    query = request.args.get('q', '')
+    query = request.args.get('q', '').strip()
     if query:
-        conn = sqlite3.connect('blog.db')
+        conn = get_db()
         c = conn.cursor()
-        c.execute("""SELECT * FROM posts 
-                    WHERE is_deleted=0 AND (title LIKE ? OR excerpt LIKE ? OR content LIKE ?) 
-                    ORDER BY created_at DESC""",
-                 (f'%{query}%', f'%{query}%', f'%{query}%'))
-        posts = c.fetchall()
-        conn.close()
+        posts = search_posts(c, current_content(), query)
         return render_template('search_results.html', posts=posts, query=query)
     return redirect(url_for('index'))
 
@@ -350,45 +2162,7 @@ def admin_login():
 
     # Access code gate: if an access code is set and user has not passed the gate, show code form
     if ADMIN_ACCESS_CODE and not session.get('admin_gate_ok'):
-        return render_template_string(
-            """
-            <!DOCTYPE html>
-            <html lang="tr">
-            <head>
-              <meta charset="UTF-8">
-              <meta name="viewport" content="width=device-width, initial-scale=1.0">
-              <title>Admin Erişim Kodu</title>
-              <style>
-                body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial; background:#0f172a; color:#e2e8f0; display:flex; align-items:center; justify-content:center; height:100vh; margin:0; }
-                .card { background:#1e293b; padding:24px; border-radius:12px; width:100%; max-width:420px; box-shadow:0 10px 30px rgba(0,0,0,0.3); border:1px solid #334155; }
-                h1 { margin:0 0 10px; font-size:20px; color:#f8fafc; }
-                p { margin:0 0 16px; color:#94a3b8; font-size:14px; }
-                input { width:100%; padding:12px 14px; border-radius:10px; background:#0f172a; color:#f8fafc; border:1px solid #334155; outline:none; }
-                input:focus { border-color:#3b82f6; box-shadow:0 0 0 4px rgba(59,130,246,0.15); }
-                .btn { margin-top:14px; width:100%; padding:12px 14px; background:linear-gradient(135deg,#3b82f6,#06b6d4); color:#fff; border:none; border-radius:10px; font-weight:700; letter-spacing:.3px; cursor:pointer; }
-                .err { color:#fecaca; background:#7f1d1d; border:1px solid #b91c1c; padding:10px; border-radius:10px; margin-bottom:12px; }
-              </style>
-            </head>
-            <body>
-              <form class="card" method="post" action="{{ url_for('admin_access_gate') }}">
-                <h1>Gizli Erişim</h1>
-                <p>Admin paneline erişmek için erişim kodunu girin.</p>
-                {% with messages = get_flashed_messages(with_categories=true) %}
-                  {% if messages %}
-                    {% for category, message in messages %}
-                      {% if category in ['error','danger'] %}
-                        <div class="err">{{ message }}</div>
-                      {% endif %}
-                    {% endfor %}
-                  {% endif %}
-                {% endwith %}
-                <input type="password" name="code" placeholder="Erişim Kodu" required>
-                <button class="btn" type="submit">Giriş</button>
-              </form>
-            </body>
-            </html>
-            """
-        )
+        return render_template('admin/access_gate.html')
 
     # Otherwise show normal login page
     return render_template('admin/login.html')
@@ -398,11 +2172,10 @@ def admin_login_post():
     username = request.form['username']
     password = request.form['password']
     
-    conn = sqlite3.connect('blog.db')
+    conn = get_db()
     c = conn.cursor()
     c.execute("SELECT * FROM admin_users WHERE username = ?", (username,))
     user = c.fetchone()
-    conn.close()
     
     if user and check_password_hash(user[2], password):
         session['admin_logged_in'] = True
@@ -421,50 +2194,191 @@ def admin_logout():
     flash('Başarıyla çıkış yaptınız!', 'info')
     return redirect(url_for('admin_login'))
 
+DASHBOARD_CHART_DAYS = 30
+
 @app.route(f"{ADMIN_PREFIX}/dashboard")
 def admin_dashboard():
     if 'admin_logged_in' not in session:
         return redirect(url_for('admin_login'))
     
-    conn = sqlite3.connect('blog.db')
-    conn.row_factory = sqlite3.Row
+    conn = get_db()
     c = conn.cursor()
     
-    # Get statistics (exclude deleted)
-    c.execute("SELECT COUNT(*) FROM posts WHERE is_deleted=0")
-    total_posts = c.fetchone()[0]
+    # Get statistics (trigger-maintained; see _migrate_stats)
+    counters = get_counters(c, ['published_posts', 'published_views', 'trashed_items', 'media_bytes'])
     
-    c.execute("SELECT SUM(views) FROM posts WHERE is_deleted=0")
-    total_views_row = c.fetchone()
-    total_views = total_views_row[0] if total_views_row and total_views_row[0] is not None else 0
+    c.execute("SELECT category, posts, views FROM category_stats WHERE posts > 0 ORDER BY posts DESC, category")
+    categories = c.fetchall()
     
-    # Get recent posts
-    c.execute("SELECT * FROM posts WHERE is_deleted=0 ORDER BY created_at DESC LIMIT 5")
-    recent_posts = c.fetchall()
+    # Views per day over the last DASHBOARD_CHART_DAYS days, zero-filled
+    c.execute("""SELECT day, SUM(views) FROM views_daily
+                 WHERE day > date('now', ?) GROUP BY day""", (f'-{DASHBOARD_CHART_DAYS} days',))
+    per_day = dict(c.fetchall())
+    today = datetime.now(timezone.utc).date()
+    daily_views = []
+    for offset in range(DASHBOARD_CHART_DAYS - 1, -1, -1):
+        day = (today - timedelta(days=offset)).isoformat()
+        daily_views.append({'day': day, 'views': per_day.get(day, 0)})
+    max_daily_views = max([d['views'] for d in daily_views] + [1])
     
-    conn.close()
+    # Get recent posts
+    c.execute(f"SELECT {post_summary_columns()} FROM posts WHERE is_deleted=0 ORDER BY created_at DESC LIMIT 5")
+    recent_posts = to_post_summaries(c.fetchall())
     
     stats = {
-        'total_posts': total_posts,
-        'total_views': total_views,
-        'recent_posts': recent_posts
+        'total_posts': counters['published_posts'],
+        'total_views': counters['published_views'] + view_counter.pending_total(),
+        'trashed_items': counters['trashed_items'],
+        'media_bytes': counters['media_bytes'],
+        'categories': categories,
+        'daily_views': daily_views,
+        'max_daily_views': max_daily_views,
+        'recent_posts': recent_posts,
+        'page_cache': page_cache.stats(),
+        'tasks': task_executor.stats(c)
     }
     
     return render_template('admin/dashboard.html', stats=stats)
 
+@app.route(f"{ADMIN_PREFIX}/metrics")
+def admin_metrics():
+    # Prometheus text format; scrapers authenticate with METRICS_TOKEN
+    token = app.config['METRICS_TOKEN']
+    auth = request.headers.get('Authorization', '')
+    authorized = bool(token) and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:], token)
+    if not authorized and 'admin_logged_in' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    cache = page_cache.stats()
+    lookups = cache['hits'] + cache['misses']
+    tasks = task_executor.stats(get_db().cursor(), recent=0)['counts']
+    extra = [
+        ('blog_page_cache_hits_total', 'counter', 'Rendered page cache hits.', [('', cache['hits'])]),
+        ('blog_page_cache_misses_total', 'counter', 'Rendered page cache misses.', [('', cache['misses'])]),
+        ('blog_page_cache_hit_ratio', 'gauge', 'Rendered page cache hit ratio since start.',
+         [('', round(cache['hits'] / lookups, 4) if lookups else 0)]),
+        ('blog_page_cache_entries', 'gauge', 'Pages held in the rendered page cache.', [('', cache['entries'])]),
+        ('blog_content_snapshot_builds_total', 'counter', 'Published-content snapshot rebuilds.',
+         [('', published_content.builds)]),
+        ('blog_content_snapshot_view_refreshes_total', 'counter', 'Snapshot view count refreshes.',
+         [('', published_content.view_refreshes)]),
+        ('blog_view_counts_pending', 'gauge', 'Post views buffered and not yet written.',
+         [('', view_counter.pending_total())]),
+        ('blog_sql_slow_queries_total', 'counter', 'Statements slower than SLOW_QUERY_MS.',
+         [('', query_log.slow_total())]),
+        ('blog_tasks', 'gauge', 'Background jobs by status.',
+         [(f'{{status="{status}"}}', count) for status, count in sorted(tasks.items())]),
+    ]
+    response = make_response(metrics.render(extra))
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
+
+@app.route(f"{ADMIN_PREFIX}/slow-queries")
+def admin_slow_queries():
+    if 'admin_logged_in' not in session:
+        return redirect(url_for('admin_login'))
+    report = query_log.report()
+    return render_template('admin/slow_queries.html', report=report,
+                           threshold_ms=app.config['SLOW_QUERY_MS'], pid=os.getpid())
+
+@app.route(f"{ADMIN_PREFIX}/slow-queries/reset", methods=['POST'])
+def admin_reset_slow_queries():
+    if 'admin_logged_in' not in session:
+        return redirect(url_for('admin_login'))
+    query_log.reset()
+    flash('Sorgu istatistikleri sıfırlandı.', 'success')
+    return redirect(url_for('admin_slow_queries'))
+
+@app.route(f"{ADMIN_PREFIX}/tasks/backup", methods=['POST'])
+def admin_queue_backup():
+    if 'admin_logged_in' not in session:
+        return redirect(url_for('admin_login'))
+    conn = get_db()
+    c = conn.cursor()
+    enqueue_task(c, 'backup', max_attempts=1)
+    conn.commit()
+    task_executor.wake()
+    flash('Yedekleme arka planda başlatıldı.', 'success')
+    return redirect(url_for('admin_dashboard'))
+
+@app.route(f"{ADMIN_PREFIX}/tasks/retry/<int:job_id>", methods=['POST'])
+def admin_retry_task(job_id):
+    if 'admin_logged_in' not in session:
+        return redirect(url_for('admin_login'))
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("""UPDATE jobs SET status='pending', attempts=0, locked_until=NULL,
+                 run_after=CAST(strftime('%s', 'now') AS INTEGER), updated_at=CURRENT_TIMESTAMP
+                 WHERE id=? AND status='failed'""", (job_id,))
+    conn.commit()
+    task_executor.wake()
+    flash('İş yeniden kuyruğa alındı.', 'success')
+    return redirect(url_for('admin_dashboard'))
+
 @app.route(f"{ADMIN_PREFIX}/posts")
 def admin_posts():
     if 'admin_logged_in' not in session:
         return redirect(url_for('admin_login'))
     
-    conn = sqlite3.connect('blog.db')
-    conn.row_factory = sqlite3.Row
+    conn = get_db()
     c = conn.cursor()
-    c.execute("SELECT * FROM posts WHERE is_deleted=0 ORDER BY created_at DESC")
-    posts = c.fetchall()
-    conn.close()
+    listing = query_admin_posts(c, request.args)
+    # Trigger-maintained, so the filter list costs the same however many posts there are
+    c.execute("SELECT category FROM category_stats WHERE posts > 0 AND category != '' ORDER BY category")
+    categories = [row[0] for row in c.fetchall()]
     
-    return render_template('admin/posts.html', posts=posts)
+    return render_template('admin/posts.html', listing=listing, categories=categories)
+
+@app.route(f"{ADMIN_PREFIX}/posts/data")
+def admin_posts_data():
+    # JSON pages of the post listing for incremental loading in posts.html
+    if 'admin_logged_in' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    listing = query_admin_posts(get_db().cursor(), request.args)
+    listing['posts'] = [dict(post) for post in listing['posts']]
+    return jsonify(listing)
+
+# Admin listings select only the columns they show and page server-side
+ADMIN_PAGE_SIZE = 20
+ADMIN_POST_SORTS = {
+    'newest': 'created_at DESC, id DESC',
+    'oldest': 'created_at ASC, id ASC',
+    'updated': 'updated_at DESC, id DESC',
+    'views': 'views DESC, id DESC',
+    'title': 'title COLLATE NOCASE ASC, id ASC',
+}
+
+def query_admin_posts(c, args, columns="id, title, category, created_at, views"):
+    sort = args.get('sort', 'newest')
+    if sort not in ADMIN_POST_SORTS:
+        sort = 'newest'
+    q = args.get('q', '').strip()
+    category = args.get('category', '').strip()
+    where = ["is_deleted=0"]
+    params = []
+    if q:
+        where.append("title LIKE ? ESCAPE '\\'")
+        params.append('%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+    if category:
+        where.append("category = ?")
+        params.append(category)
+    where_sql = ' AND '.join(where)
+    # Totals come from the trigger-maintained counters; only a title search,
+    # which they cannot answer, counts rows
+    if q:
+        c.execute(f"SELECT COUNT(*) FROM posts WHERE {where_sql}", params)
+        total = c.fetchone()[0]
+    elif category:
+        c.execute("SELECT posts FROM category_stats WHERE category = ?", (category,))
+        row = c.fetchone()
+        total = row[0] if row else 0
+    else:
+        total = get_counter(c, 'published_posts')
+    pages = max(1, -(-total // ADMIN_PAGE_SIZE))
+    page = min(max(args.get('page', 1, type=int), 1), pages)
+    c.execute(f"SELECT {columns} FROM posts WHERE {where_sql} ORDER BY {ADMIN_POST_SORTS[sort]} LIMIT ? OFFSET ?",
+              params + [ADMIN_PAGE_SIZE, (page - 1) * ADMIN_PAGE_SIZE])
+    return {'posts': c.fetchall(), 'total': total, 'page': page, 'pages': pages,
+            'has_more': page < pages, 'sort': sort, 'q': q, 'category': category}
 
 # Admin Post Create/Edit Routes
 @app.route(f"{ADMIN_PREFIX}/posts/new")
@@ -477,17 +2391,15 @@ def admin_new_post():
 def admin_edit_post(post_id):
     if 'admin_logged_in' not in session:
         return redirect(url_for('admin_login'))
-    conn = sqlite3.connect('blog.db')
+    conn = get_db()
     c = conn.cursor()
     c.execute("SELECT * FROM posts WHERE id = ?", (post_id,))
     post = c.fetchone()
     if not post:
-        conn.close()
         flash('Yazı bulunamadı!', 'error')
         return redirect(url_for('admin_posts'))
     c.execute("SELECT id, image_filename FROM post_images WHERE post_id = ? AND is_deleted=0 ORDER BY display_order", (post_id,))
     images = [{'id': row[0], 'image_filename': row[1]} for row in c.fetchall()]
-    conn.close()
     return render_template('admin/post_form.html', post=post, images=images)
 
 @app.route(f"{ADMIN_PREFIX}/posts/save", methods=['POST'])
@@ -504,7 +2416,10 @@ def admin_save_post():
         if post_id:
             return redirect(url_for('admin_edit_post', post_id=post_id))
         return redirect(url_for('admin_new_post'))
-    conn = sqlite3.connect('blog.db')
+    # Copy the uploads to disk before taking the writer lock
+    spooled = [spool_upload(file) for file in request.files.getlist('images')
+               if file and allowed_file(file.filename)]
+    conn = get_db()
     c = conn.cursor()
     try:
         if post_id:
@@ -517,28 +2432,24 @@ def admin_save_post():
                       (title, excerpt, content, category))
             current_post_id = c.lastrowid
             flash('Yazı oluşturuldu!', 'success')
+        index_posts_for_search(c, [current_post_id])
         # Handle images
-        files = request.files.getlist('images')
         order = 0
-        for file in files:
-            if file and allowed_file(file.filename):
-                ext = file.filename.rsplit('.', 1)[1].lower()
-                filename = f"{uuid.uuid4()}.{ext}"
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
-                c.execute("""INSERT INTO post_images (post_id, image_filename, display_order) VALUES (?, ?, ?)""",
-                          (current_post_id, filename, order))
-                order += 1
+        for upload in spooled:
+            filename = store_upload(c, upload)
+            c.execute("""INSERT INTO post_images (post_id, image_filename, display_order) VALUES (?, ?, ?)""",
+                      (current_post_id, filename, order))
+            order += 1
+        content_changed(c)
         conn.commit()
+        task_executor.wake()
     except Exception as e:
         conn.rollback()
+        discard_spooled(spooled)
         flash(f'Kaydetme sırasında hata: {str(e)}', 'error')
         if post_id:
-            conn.close()
             return redirect(url_for('admin_edit_post', post_id=post_id))
-        conn.close()
         return redirect(url_for('admin_new_post'))
-    conn.close()
     return redirect(url_for('admin_posts'))
 
 @app.route(f"{ADMIN_PREFIX}/posts/images/delete/<int:image_id>", methods=['DELETE'])
@@ -546,11 +2457,11 @@ def admin_delete_post_image(image_id):
     if 'admin_logged_in' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     try:
-        conn = sqlite3.connect('blog.db')
+        conn = get_db()
         c = conn.cursor()
         c.execute("UPDATE post_images SET is_deleted=1, deleted_at=CURRENT_TIMESTAMP WHERE id = ?", (image_id,))
+        content_changed(c)
         conn.commit()
-        conn.close()
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -573,31 +2484,88 @@ def admin_access_gate():
         return redirect(url_for('admin_login'))
 
 # Trash Management Routes
+TRASH_TABLES = {
+    'post': 'posts',
+    'favorite': 'favorites',
+    'favorite_image': 'favorite_images',
+    'post_image': 'post_images'
+}
+# Image rows purged together with their parent, trashed or not
+TRASH_CHILDREN = {'post': ('post_images', 'post_id'), 'favorite': ('favorite_images', 'favorite_id')}
+TRASH_PAGE_SIZE = 50
+
+def purge_trash(c, item_type, ids=None, older_than_days=None):
+    # Permanently delete trashed items of one type inside the caller's
+    # transaction: the given ids, everything deleted more than older_than_days
+    # ago, or with neither the whole trash. Rows go first (the blobs triggers
+    # drop the refcounts), then unreferenced files are queued for removal in
+    # one batch. Returns the number of items deleted.
+    table = TRASH_TABLES[item_type]
+    if ids is not None:
+        ids = list(ids)
+        conditions = [(f"id IN ({','.join('?' * len(ids[i:i + _PREFETCH_CHUNK]))})", ids[i:i + _PREFETCH_CHUNK])
+                      for i in range(0, len(ids), _PREFETCH_CHUNK)]
+    elif older_than_days is not None:
+        conditions = [("deleted_at < datetime('now', ?)", [f"-{int(older_than_days)} days"])]
+    else:
+        conditions = [("1", [])]
+    released = []
+    deleted = 0
+    for condition, params in conditions:
+        selected = f"SELECT id FROM {table} WHERE is_deleted = 1 AND {condition}"
+        if item_type in TRASH_CHILDREN:
+            child_table, parent_column = TRASH_CHILDREN[item_type]
+            c.execute(f"SELECT image_filename FROM {child_table} WHERE {parent_column} IN ({selected})", params)
+            released.extend(row[0] for row in c.fetchall())
+            c.execute(f"DELETE FROM {child_table} WHERE {parent_column} IN ({selected})", params)
+        if item_type != 'favorite':
+            c.execute(f"SELECT image_filename FROM {table} WHERE is_deleted = 1 AND {condition}", params)
+            released.extend(row[0] for row in c.fetchall())
+        c.execute(f"DELETE FROM {table} WHERE is_deleted = 1 AND {condition}", params)
+        deleted += c.rowcount
+    release_uploads(c, released)
+    return deleted
+
+@task('trash_retention', every=app.config['TRASH_SWEEP_INTERVAL'])
+def _trash_retention_task(payload):
+    days = app.config['TRASH_RETENTION_DAYS']
+    if days <= 0:
+        return
+    conn = get_db()
+    c = conn.cursor()
+    try:
+        deleted = sum(purge_trash(c, item_type, older_than_days=days) for item_type in TRASH_TABLES)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if deleted:
+        print(f"Trash retention: purged {deleted} items deleted more than {days} days ago")
+
 @app.route(f"{ADMIN_PREFIX}/trash")
 def admin_trash():
     if 'admin_logged_in' not in session:
         return redirect(url_for('admin_login'))
-    conn = sqlite3.connect('blog.db')
-    conn.row_factory = sqlite3.Row
+    conn = get_db()
     c = conn.cursor()
-    # Collect trashed items
-    c.execute("SELECT * FROM posts WHERE is_deleted=1 ORDER BY deleted_at DESC")
-    trashed_posts = c.fetchall()
-    c.execute("SELECT * FROM favorites WHERE is_deleted=1 ORDER BY deleted_at DESC")
-    trashed_favorites = c.fetchall()
-    c.execute("SELECT * FROM favorite_images WHERE is_deleted=1 ORDER BY deleted_at DESC")
-    trashed_fav_images = c.fetchall()
-    c.execute("SELECT * FROM post_images WHERE is_deleted=1 ORDER BY deleted_at DESC")
-    trashed_post_images = c.fetchall()
-    conn.close()
-    return render_template('admin/trash.html',
-                           trashed_posts=trashed_posts,
-                           trashed_favorites=trashed_favorites,
-                           trashed_fav_images=trashed_fav_images,
-                           trashed_post_images=trashed_post_images)
+    # One page per section; each section pages independently (?post_page=2)
+    sections = {}
+    for item_type, label_column in (('post', 'title'), ('favorite', 'title'),
+                                    ('favorite_image', 'image_filename'), ('post_image', 'image_filename')):
+        table = TRASH_TABLES[item_type]
+        c.execute(f"SELECT COUNT(*) FROM {table} WHERE is_deleted = 1")
+        total = c.fetchone()[0]
+        pages = max(1, -(-total // TRASH_PAGE_SIZE))
+        page = min(max(request.args.get(f'{item_type}_page', 1, type=int), 1), pages)
+        c.execute(f"""SELECT id, {label_column} AS label, deleted_at FROM {table}
+                      WHERE is_deleted = 1 ORDER BY deleted_at DESC LIMIT ? OFFSET ?""",
+                  (TRASH_PAGE_SIZE, (page - 1) * TRASH_PAGE_SIZE))
+        sections[item_type] = {'items': c.fetchall(), 'total': total, 'page': page, 'pages': pages}
+    return render_template('admin/trash.html', sections=sections,
+                           retention_days=app.config['TRASH_RETENTION_DAYS'])
 
 def _validate_trash_type(item_type):
-    return item_type in {'post','favorite','favorite_image','post_image'}
+    return item_type in TRASH_TABLES
 
 @app.route(f"{ADMIN_PREFIX}/trash/restore/<item_type>/<int:item_id>", methods=['POST'])
 def admin_trash_restore(item_type, item_id):
@@ -605,18 +2573,14 @@ def admin_trash_restore(item_type, item_id):
         return jsonify({'error': 'Unauthorized'}), 401
     if not _validate_trash_type(item_type):
         return jsonify({'error': 'Invalid type'}), 400
-    table_map = {
-        'post': 'posts',
-        'favorite': 'favorites',
-        'favorite_image': 'favorite_images',
-        'post_image': 'post_images'
-    }
-    table = table_map[item_type]
-    conn = sqlite3.connect('blog.db')
+    table = TRASH_TABLES[item_type]
+    conn = get_db()
     c = conn.cursor()
     c.execute(f"UPDATE {table} SET is_deleted=0, deleted_at=NULL WHERE id=?", (item_id,))
+    if item_type == 'post':
+        index_posts_for_search(c, [item_id])
+    content_changed(c)
     conn.commit()
-    conn.close()
     return jsonify({'success': True})
 
 @app.route(f"{ADMIN_PREFIX}/trash/hard_delete/<item_type>/<int:item_id>", methods=['DELETE'])
@@ -625,65 +2589,62 @@ def admin_trash_hard_delete(item_type, item_id):
         return jsonify({'error': 'Unauthorized'}), 401
     if not _validate_trash_type(item_type):
         return jsonify({'error': 'Invalid type'}), 400
-    conn = sqlite3.connect('blog.db')
+    conn = get_db()
     c = conn.cursor()
     try:
-        if item_type == 'favorite_image':
-            c.execute("SELECT image_filename FROM favorite_images WHERE id=?", (item_id,))
-            row = c.fetchone()
-            if row:
-                fname = row[0]
-                if fname:
-                    fp = os.path.join(app.config['UPLOAD_FOLDER'], fname)
-                    if os.path.exists(fp):
-                        try:
-                            os.remove(fp)
-                        except Exception:
-                            pass
-            c.execute("DELETE FROM favorite_images WHERE id=?", (item_id,))
-        elif item_type == 'post_image':
-            c.execute("SELECT image_filename FROM post_images WHERE id=?", (item_id,))
-            row = c.fetchone()
-            if row:
-                fname = row[0]
-                if fname:
-                    fp = os.path.join(app.config['UPLOAD_FOLDER'], fname)
-                    if os.path.exists(fp):
-                        try:
-                            os.remove(fp)
-                        except Exception:
-                            pass
-            c.execute("DELETE FROM post_images WHERE id=?", (item_id,))
-        elif item_type == 'favorite':
-            c.execute("SELECT image_filename FROM favorite_images WHERE favorite_id=?", (item_id,))
-            for (fname,) in c.fetchall():
-                if fname:
-                    fp = os.path.join(app.config['UPLOAD_FOLDER'], fname)
-                    if os.path.exists(fp):
-                        try:
-                            os.remove(fp)
-                        except Exception:
-                            pass
-            c.execute("DELETE FROM favorite_images WHERE favorite_id=?", (item_id,))
-            c.execute("DELETE FROM favorites WHERE id=?", (item_id,))
-        elif item_type == 'post':
-            c.execute("SELECT image_filename FROM post_images WHERE post_id=?", (item_id,))
-            for (fname,) in c.fetchall():
-                if fname:
-                    fp = os.path.join(app.config['UPLOAD_FOLDER'], fname)
-                    if os.path.exists(fp):
-                        try:
-                            os.remove(fp)
-                        except Exception:
-                            pass
-            c.execute("DELETE FROM post_images WHERE post_id=?", (item_id,))
-            c.execute("DELETE FROM posts WHERE id=?", (item_id,))
+        purge_trash(c, item_type, ids=[item_id])
         conn.commit()
+        task_executor.wake()
         return jsonify({'success': True})
     except Exception as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route(f"{ADMIN_PREFIX}/trash/purge", methods=['POST'])
+def admin_trash_purge():
+    # Bulk purge in one transaction. JSON body, one of:
+    #   {"items": [{"type": "post", "id": 3}, ...]}
+    #   {"older_than_days": 30}
+    #   {"all": true}
+    if 'admin_logged_in' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    data = request.get_json(silent=True) or {}
+    selection = {}
+    if 'items' in data:
+        for item in data['items'] or []:
+            if not isinstance(item, dict) or not _validate_trash_type(item.get('type')):
+                return jsonify({'error': 'Invalid type'}), 400
+            try:
+                selection.setdefault(item['type'], []).append(int(item['id']))
+            except (KeyError, TypeError, ValueError):
+                return jsonify({'error': 'Invalid id'}), 400
+    elif 'older_than_days' in data:
+        try:
+            older_than_days = int(data['older_than_days'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid older_than_days'}), 400
+        if older_than_days < 0:
+            return jsonify({'error': 'Invalid older_than_days'}), 400
+    elif not data.get('all'):
+        return jsonify({'error': 'Nothing selected'}), 400
+    conn = get_db()
+    c = conn.cursor()
+    try:
+        deleted = {}
+        for item_type in TRASH_TABLES:
+            if 'items' in data:
+                if item_type in selection:
+                    deleted[item_type] = purge_trash(c, item_type, ids=selection[item_type])
+            elif 'older_than_days' in data:
+                deleted[item_type] = purge_trash(c, item_type, older_than_days=older_than_days)
+            else:
+                deleted[item_type] = purge_trash(c, item_type)
+        conn.commit()
+        task_executor.wake()
+        return jsonify({'success': True, 'deleted': deleted})
+    except Exception as e:
+        conn.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        conn.close()
 
 @app.route(f"{ADMIN_PREFIX}/posts/delete/<int:post_id>", methods=['POST'])
 def admin_delete_post(post_id):
@@ -691,7 +2652,7 @@ def admin_delete_post(post_id):
         return redirect(url_for('admin_login'))
     
     try:
-        conn = sqlite3.connect('blog.db')
+        conn = get_db()
         c = conn.cursor()
         
         # First get the post to check if it exists
@@ -701,12 +2662,11 @@ def admin_delete_post(post_id):
         if post:
             # Soft delete the post
             c.execute("UPDATE posts SET is_deleted=1, deleted_at=CURRENT_TIMESTAMP WHERE id = ?", (post_id,))
+            content_changed(c)
             conn.commit()
             flash(f'"{post[0]}" başlıklı yazı çöp kutusuna taşındı.', 'success')
         else:
             flash('Silinecek yazı bulunamadı.', 'error')
-            
-        conn.close()
         
     except Exception as e:
         flash(f'Yazı silinirken hata oluştu: {str(e)}', 'error')
@@ -718,7 +2678,7 @@ def admin_toggle_favorite(post_id):
     if 'admin_logged_in' not in session:
         return redirect(url_for('admin_login'))
     
-    conn = sqlite3.connect('blog.db')
+    conn = get_db()
     c = conn.cursor()
     
     # Get current favorite status
@@ -737,7 +2697,6 @@ def admin_toggle_favorite(post_id):
     else:
         flash('Post bulunamadı!', 'error')
     
-    conn.close()
     return redirect(url_for('admin_posts'))
 
 # Admin Favorites Management Routes
@@ -747,54 +2706,43 @@ def admin_users():
     if 'admin_logged_in' not in session:
         return redirect(url_for('admin_login'))
     
-    conn = sqlite3.connect('blog.db')
-    conn.row_factory = sqlite3.Row
+    conn = get_db()
     c = conn.cursor()
     
     # Get admin users
     c.execute("SELECT * FROM admin_users ORDER BY created_at DESC")
     users = c.fetchall()
     
-    # Get posts with their images
-    c.execute("SELECT * FROM posts WHERE is_deleted=0 ORDER BY created_at DESC")
-    posts = c.fetchall()
-    
-    # Get images for each post
+    # One page of posts with their images
+    listing = query_admin_posts(c, request.args, columns="id, title, substr(excerpt, 1, 201) AS excerpt, created_at, views")
+    images = prefetch_children(c, 'post_images', [post['id'] for post in listing['posts']])
     posts_with_images = []
-    for post in posts:
+    for post in listing['posts']:
         post_dict = dict(post)
-        c.execute("SELECT * FROM post_images WHERE post_id = ? AND is_deleted=0 ORDER BY display_order", (post['id'],))
-        images = c.fetchall()
-        post_dict['images'] = images
+        post_dict['images'] = images[post['id']]
         posts_with_images.append(post_dict)
     
-    conn.close()
-    
-    return render_template('admin/users.html', users=users, posts=posts_with_images)
+    return render_template('admin/users.html', users=users, posts=posts_with_images, listing=listing)
 
 @app.route(f"{ADMIN_PREFIX}/favorites/manage")
 def admin_favorites_manage():
     if 'admin_logged_in' not in session:
         return redirect(url_for('admin_login'))
 
-    conn = sqlite3.connect('blog.db')
-    conn.row_factory = sqlite3.Row
+    conn = get_db()
     c = conn.cursor()
 
     # Fetch all favorites
     c.execute("SELECT * FROM favorites WHERE is_deleted=0 ORDER BY display_order ASC, created_at DESC")
     favorites_list = c.fetchall()
 
+    images = prefetch_children(c, 'favorite_images', [favorite['id'] for favorite in favorites_list])
     favorites_with_images = []
     for favorite in favorites_list:
         fav_dict = dict(favorite)
-        c.execute("SELECT * FROM favorite_images WHERE favorite_id = ? AND is_deleted=0 ORDER BY display_order", (fav_dict['id'],))
-        images = c.fetchall()
-        fav_dict['images'] = images
+        fav_dict['images'] = images[fav_dict['id']]
         favorites_with_images.append(fav_dict)
 
-    conn.close()
-
     return render_template('admin/favorites_manage.html', favorites=favorites_with_images)
 
 @app.route(f"{ADMIN_PREFIX}/favorites/add", methods=['POST'])
@@ -807,29 +2755,32 @@ def admin_add_favorite():
     link = request.form.get('link', '')
     category = request.form.get('category', 'Genel')
 
-    conn = sqlite3.connect('blog.db')
+    # Copy the uploads to disk before taking the writer lock
+    spooled = [spool_upload(file) for file in request.files.getlist('images')
+               if file and file.filename != '' and allowed_file(file.filename)]
+
+    conn = get_db()
     c = conn.cursor()
-    
-    # Insert favorite item and get its ID
-    c.execute("""INSERT INTO favorites (title, description, link, category) 
-                 VALUES (?, ?, ?, ?)""",
-              (title, description, link, category))
-    favorite_id = c.lastrowid
-
-    # Handle multiple image uploads
-    files = request.files.getlist('images')
-    for file in files:
-        if file and file.filename != '' and allowed_file(file.filename):
-            filename = str(uuid.uuid4()) + '.' + file.filename.rsplit('.', 1)[1].lower()
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-            
-            # Insert image record into favorite_images
+    try:
+        # Insert favorite item and get its ID
+        c.execute("""INSERT INTO favorites (title, description, link, category) 
+                     VALUES (?, ?, ?, ?)""",
+                  (title, description, link, category))
+        favorite_id = c.lastrowid
+
+        # Insert image records into favorite_images
+        for upload in spooled:
+            filename = store_upload(c, upload)
             c.execute("""INSERT INTO favorite_images (favorite_id, image_filename) 
                          VALUES (?, ?)""", (favorite_id, filename))
 
-    conn.commit()
-    conn.close()
+        content_changed(c)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        discard_spooled(spooled)
+        raise
+    task_executor.wake()
     
     flash('Favori başarıyla eklendi!', 'success')
     return redirect(url_for('admin_favorites_manage'))
@@ -839,8 +2790,7 @@ def admin_edit_favorite(favorite_id):
     if 'admin_logged_in' not in session:
         return redirect(url_for('admin_login'))
 
-    conn = sqlite3.connect('blog.db')
-    conn.row_factory = sqlite3.Row
+    conn = get_db()
     c = conn.cursor()
 
     if request.method == 'POST':
@@ -849,21 +2799,26 @@ def admin_edit_favorite(favorite_id):
         link = request.form.get('link', '')
         category = request.form.get('category', 'Genel')
         
-        # Update favorite details
-        c.execute("""UPDATE favorites SET title=?, description=?, link=?, category=? WHERE id=?""", 
-                  (title, description, link, category, favorite_id))
-
-        # Handle new image uploads
-        files = request.files.getlist('images')
-        for file in files:
-            if file and file.filename != '' and allowed_file(file.filename):
-                filename = str(uuid.uuid4()) + '.' + file.filename.rsplit('.', 1)[1].lower()
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+        # Copy new uploads to disk before taking the writer lock
+        spooled = [spool_upload(file) for file in request.files.getlist('images')
+                   if file and file.filename != '' and allowed_file(file.filename)]
+        try:
+            # Update favorite details
+            c.execute("""UPDATE favorites SET title=?, description=?, link=?, category=? WHERE id=?""", 
+                      (title, description, link, category, favorite_id))
+
+            for upload in spooled:
+                filename = store_upload(c, upload)
                 c.execute("INSERT INTO favorite_images (favorite_id, image_filename) VALUES (?, ?)", 
                           (favorite_id, filename))
 
-        conn.commit()
-        conn.close()
+            content_changed(c)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            discard_spooled(spooled)
+            raise
+        task_executor.wake()
         flash('Favori başarıyla güncellendi!', 'success')
         return redirect(url_for('admin_favorites_manage'))
 
@@ -872,13 +2827,11 @@ def admin_edit_favorite(favorite_id):
     favorite = c.fetchone()
 
     if favorite is None:
-        conn.close()
         flash('Favori bulunamadı!', 'error')
         return redirect(url_for('admin_favorites_manage'))
 
     c.execute("SELECT * FROM favorite_images WHERE favorite_id = ? ORDER BY id DESC", (favorite_id,))
     images = c.fetchall()
-    conn.close()
 
     return render_template('admin/favorite_edit.html', favorite=favorite, images=images)
 
@@ -888,13 +2841,13 @@ def admin_delete_favorite_image(image_id):
         return jsonify({'error': 'Unauthorized'}), 401
 
     try:
-        conn = sqlite3.connect('blog.db')
+        conn = get_db()
         c = conn.cursor()
         
         # Soft delete favorite image
         c.execute("UPDATE favorite_images SET is_deleted=1, deleted_at=CURRENT_TIMESTAMP WHERE id = ?", (image_id,))
+        content_changed(c)
         conn.commit()
-        conn.close()
         return jsonify({'success': True})
             
     except Exception as e:
@@ -906,14 +2859,14 @@ def admin_delete_favorite(favorite_id):
         return jsonify({'error': 'Unauthorized'}), 401
 
     try:
-        conn = sqlite3.connect('blog.db')
+        conn = get_db()
         c = conn.cursor()
         
         # Soft delete favorite and its images
         c.execute("UPDATE favorites SET is_deleted=1, deleted_at=CURRENT_TIMESTAMP WHERE id = ?", (favorite_id,))
         c.execute("UPDATE favorite_images SET is_deleted=1, deleted_at=CURRENT_TIMESTAMP WHERE favorite_id = ?", (favorite_id,))
+        content_changed(c)
         conn.commit()
-        conn.close()
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -936,22 +2889,20 @@ def admin_add_user():
         flash('Şifre en az 6 karakter olmalıdır!', 'error')
         return redirect(url_for('admin_users'))
     
-    conn = sqlite3.connect('blog.db')
+    conn = get_db()
     c = conn.cursor()
     
     # Check if username already exists
     c.execute("SELECT * FROM admin_users WHERE username = ?", (username,))
     if c.fetchone():
         flash('Bu kullanıcı adı zaten kullanılıyor!', 'error')
-        conn.close()
         return redirect(url_for('admin_users'))
     
     # Create new user
     password_hash = generate_password_hash(password)
-    c.execute("INSERT INTO admin_users (username, password_hash) VALUES (?, ?)",
+    c.execute("INSERT INTO admin_users (username, password_hash, created_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
              (username, password_hash))
     conn.commit()
-    conn.close()
     
     flash(f'Kullanıcı "{username}" başarıyla eklendi!', 'success')
     return redirect(url_for('admin_users'))
@@ -961,7 +2912,7 @@ def admin_delete_user(user_id):
     if 'admin_logged_in' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    conn = sqlite3.connect('blog.db')
+    conn = get_db()
     c = conn.cursor()
     
     # Get user info
@@ -969,27 +2920,87 @@ def admin_delete_user(user_id):
     user = c.fetchone()
     
     if not user:
-        conn.close()
         return jsonify({'error': 'User not found'}), 404
     
     # Prevent deleting the main admin user
     if user[0] == 'admin':
-        conn.close()
         return jsonify({'error': 'Cannot delete main admin user'}), 403
     
     # Delete user
     c.execute("DELETE FROM admin_users WHERE id = ?", (user_id,))
     conn.commit()
-    conn.close()
     
     return jsonify({'success': True})
 
+# HTTP caching policy per kind of response
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+STATIC_DEFAULT_MAX_AGE = 3600
+
+# Static asset URLs for templates. When scripts/build_assets.py has been run,
+# its manifest maps each source file to a minified, content-hashed copy under
+# static/dist/; otherwise the file's mtime is appended as ?v=.
+def _load_asset_manifest():
+    path = os.path.join(app.static_folder, 'dist', 'manifest.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+_asset_manifest = _load_asset_manifest()
+_static_versions = {}
+
+@app.template_global()
+def static_url(filename):
+    # Debug serves the sources so edits show up without a rebuild
+    if not DEBUG and filename in _asset_manifest:
+        return url_for('static', filename=_asset_manifest[filename])
+    version = _static_versions.get(filename)
+    if version is None or DEBUG:
+        try:
+            version = int(os.path.getmtime(os.path.join(app.static_folder, filename)))
+        except OSError:
+            version = 0
+        _static_versions[filename] = version
+    return url_for('static', filename=filename, v=version)
+
+def send_static(filename):
+    # Serve the prebuilt .gz sibling when there is one and the client accepts gzip
+    gz_path = safe_join(app.static_folder, filename + '.gz')
+    if gz_path is None or not os.path.isfile(gz_path):
+        return app.send_static_file(filename)
+    if request.accept_encodings['gzip']:
+        response = send_from_directory(app.static_folder, filename + '.gz',
+                                       mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = app.send_static_file(filename)
+    response.vary.add('Accept-Encoding')
+    return response
+
+app.view_functions['static'] = send_static
+
+def _apply_cache_policy(response):
+    if request.endpoint == 'static':
+        filename = (request.view_args or {}).get('filename', '')
+        # Versioned or content-hashed URLs and uploads (content-addressed or
+        # legacy uuid names, never rewritten) never change
+        if request.args.get('v') or filename.startswith(('dist/', 'images/')):
+            response.headers['Cache-Control'] = f'public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response.headers['Cache-Control'] = f'public, max-age={STATIC_DEFAULT_MAX_AGE}'
+    elif g.get('http_revalidate'):
+        # Public HTML: may be stored, but must be revalidated with ETag/Last-Modified
+        response.headers['Cache-Control'] = 'no-cache'
+    else:
+        # Admin pages, redirects, JSON and errors are never stored
+        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        response.headers['Pragma'] = 'no-cache'
+        response.headers['Expires'] = '0'
+
 @app.after_request
 def after_request(response):
-    # Disable caching for dynamic content
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    _apply_cache_policy(response)
     # Security headers
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'DENY'
@@ -999,6 +3010,20 @@ def after_request(response):
         response.headers['Strict-Transport-Security'] = 'max-age=63072000; includeSubDomains; preload'
     return response
 
+# Compile every template at startup (straight from the bytecode cache once a
+# worker has written it) so no request pays for compiling one
+def warm_templates():
+    compiled = 0
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        try:
+            app.jinja_env.get_template(name)
+            compiled += 1
+        except Exception as e:
+            print(f"Template warm-up failed for {name}: {e}")
+    return compiled
+
+warm_templates()
+
 if __name__ == '__main__':
     # Development server only
     host = os.environ.get('FLASK_HOST', '0.0.0.0')
@@ -0,0 +1,203 @@
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+
+from app import app, view_counter
+from wsgi import application as wsgi_application
+
+
+# ASGI entry point. Connections, keep-alive and slow clients are handled by the
+# event loop of an ASGI server, so idle or slow connections cost no thread:
+#
+#   uvicorn asgi:application --host 0.0.0.0 --port 8080 --workers 4
+#
+# The ASGI server is optional and not in requirements.txt (serve.py with
+# waitress is the default); install one, e.g. `pip install uvicorn`, to use it.
+#
+# Requests run through the same Flask app and templates as under WSGI (page
+# cache, ETags, view counts, metrics all apply), on one of two thread pools:
+# the public read-only pages on a dedicated pool sized for SQLite reads and
+# rendering, and everything else (admin, form posts, uploads, static files) on
+# a separate pool, so admin work can never starve the public pages.
+
+READ_ENDPOINTS = {'index', 'post_detail', 'about', 'favorites', 'search'}
+READ_METHODS = {'GET', 'HEAD'}
+TOO_LARGE = object()
+app.config['ASGI_READ_THREADS'] = int(os.environ.get('ASGI_READ_THREADS', '8'))
+app.config['ASGI_WSGI_THREADS'] = int(os.environ.get('ASGI_WSGI_THREADS', '4'))
+
+
+_url_adapter = app.url_map.bind('localhost')
+
+
+def _is_read_request(scope):
+    if scope['method'] not in READ_METHODS:
+        return False
+    try:
+        endpoint, _ = _url_adapter.match(scope['path'], method=scope['method'])
+    except (HTTPException, RequestRedirect):
+        return False
+    return endpoint in READ_ENDPOINTS
+
+
+def _build_environ(scope, body):
+    # PEP 3333 carries the path as latin-1 decoded bytes
+    path = scope.get('raw_path') or scope['path'].encode('utf-8')
+    if isinstance(path, bytes):
+        path = path.split(b'?', 1)[0].decode('latin-1')
+    root_path = scope.get('root_path', '')
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path,
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+            environ[name] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The whole body is already read; a chunked request has no Content-Length
+    # of its own and WSGI apps read only as many bytes as it declares
+    environ['CONTENT_LENGTH'] = str(len(body))
+    environ.pop('HTTP_TRANSFER_ENCODING', None)
+    return environ
+
+
+def _start(environ):
+    # Runs on a pool thread: call the app and pull the first two body chunks, so
+    # a typical (single chunk) page needs only this one hop off the event loop
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                               for name, value in headers]
+        return _unsupported_write
+
+    app_iter = wsgi_application(environ, start_response)
+    chunks = iter(app_iter)
+    first = next(chunks, None)
+    following = next(chunks, None) if first is not None else None
+    return response, app_iter, chunks, first, following
+
+
+def _unsupported_write(data):
+    raise RuntimeError('The WSGI write() callable is not supported under the ASGI entry point')
+
+
+def _close(app_iter):
+    if hasattr(app_iter, 'close'):
+        app_iter.close()
+
+
+class ReadPathApplication:
+    def __init__(self):
+        self.read_executor = None
+        self.wsgi_executor = None
+
+    def _executors(self):
+        if self.read_executor is None:
+            self.read_executor = ThreadPoolExecutor(app.config['ASGI_READ_THREADS'], thread_name_prefix='asgi-read')
+            self.wsgi_executor = ThreadPoolExecutor(app.config['ASGI_WSGI_THREADS'], thread_name_prefix='asgi-wsgi')
+        return self.read_executor, self.wsgi_executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._executors()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.read_executor is not None:
+                    self.read_executor.shutdown(wait=True)
+                    self.wsgi_executor.shutdown(wait=True)
+                    self.read_executor = self.wsgi_executor = None
+                view_counter.flush()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        # None if the client went away, TOO_LARGE past MAX_CONTENT_LENGTH
+        chunks = []
+        size = 0
+        limit = app.config['MAX_CONTENT_LENGTH']
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if limit and size > limit:
+                # Chunked uploads declare no length, so Flask could not tell a
+                # truncated body from a complete one; refuse it here
+                return TOO_LARGE
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                break
+        return b''.join(chunks)
+
+    async def _http(self, scope, receive, send):
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        if body is TOO_LARGE:
+            await send({'type': 'http.response.start', 'status': 413,
+                        'headers': [(b'content-type', b'text/plain; charset=utf-8'), (b'connection', b'close')]})
+            await send({'type': 'http.response.body', 'body': b'Request Entity Too Large'})
+            return
+        read_executor, wsgi_executor = self._executors()
+        executor = read_executor if _is_read_request(scope) else wsgi_executor
+        loop = asyncio.get_running_loop()
+        environ = _build_environ(scope, body)
+        response, app_iter, chunks, chunk, following = await loop.run_in_executor(executor, _start, environ)
+        try:
+            await send({'type': 'http.response.start', 'status': response['status'],
+                        'headers': response['headers']})
+            # The body goes out from the event loop; only producing further
+            # chunks of a streamed response goes back to the pool
+            while True:
+                more = following is not None
+                if chunk or not more:
+                    await send({'type': 'http.response.body', 'body': chunk or b'', 'more_body': more})
+                if not more:
+                    break
+                chunk = following
+                following = await loop.run_in_executor(executor, next, chunks, None)
+        finally:
+            _close(app_iter)
+
+
+application = ReadPathApplication()
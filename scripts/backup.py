@@ -1,41 +1,213 @@
+import argparse
+import hashlib
+import json
 import os
 import shutil
+import sqlite3
+import sys
+import zipfile
 from datetime import datetime
 
 
-def main():
+MANIFEST_NAME = 'manifest.json'
+KEEP_SNAPSHOTS = 7
+CHUNK_SIZE = 1024 * 1024
+# Pages copied per step of the online backup; other connections can write in between
+BACKUP_PAGES_PER_STEP = 1024
+
+
+def backup_database(db_path, target_path):
+    # Consistent copy through the SQLite online backup API (WAL contents included),
+    # unlike a file copy taken while the app is writing
+    src = sqlite3.connect(db_path)
+    dst = sqlite3.connect(target_path)
+    try:
+        with dst:
+            src.backup(dst, pages=BACKUP_PAGES_PER_STEP)
+        dst.execute("PRAGMA journal_mode=DELETE")  # self-contained single file
+    finally:
+        dst.close()
+        src.close()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def list_snapshots(backups_dir):
+    # Snapshot directories are named by timestamp, so names sort by age
+    return sorted(name for name in os.listdir(backups_dir)
+                  if os.path.isdir(os.path.join(backups_dir, name)) and name[:8].isdigit())
+
+
+def load_manifest(snapshot_dir):
+    path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def snapshot_images(images_src, images_dst, previous_dir, previous_manifest):
+    # Hardlink every file that is unchanged since the previous snapshot and
+    # copy only new or modified ones. A file whose size and mtime match the
+    # previous manifest is not even read; otherwise it is hashed and matched
+    # against any file of the previous snapshot with the same content.
+    previous_files = (previous_manifest or {}).get('files', {})
+    by_hash = {entry['sha256']: rel for rel, entry in previous_files.items()}
+    manifest = {}
+    stats = {'linked': 0, 'copied': 0, 'copied_bytes': 0}
+
+    for root, dirs, files in os.walk(images_src):
+        dirs.sort()
+        for name in sorted(files):
+            if name.startswith('.'):
+                continue  # in-flight uploads (.upload-*) and editor files
+            src = os.path.join(root, name)
+            rel = os.path.relpath(src, images_src).replace(os.sep, '/')
+            st = os.stat(src)
+            prev = previous_files.get(rel)
+            if prev and prev['size'] == st.st_size and prev['mtime_ns'] == st.st_mtime_ns:
+                sha256 = prev['sha256']
+            else:
+                sha256 = file_sha256(src)
+            manifest[rel] = {'sha256': sha256, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+            dst = os.path.join(images_dst, *rel.split('/'))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if sha256 in by_hash:
+                try:
+                    os.link(os.path.join(previous_dir, 'images', *by_hash[sha256].split('/')), dst)
+                    stats['linked'] += 1
+                    continue
+                except OSError:
+                    pass  # previous copy missing or no hardlink support: copy instead
+            shutil.copy2(src, dst)
+            stats['copied'] += 1
+            stats['copied_bytes'] += st.st_size
+    return manifest, stats
+
+
+def write_zip(snapshot_dir, archive_path):
+    # Streams each file into the archive in chunks; images are stored as-is
+    # since they are already compressed
+    with zipfile.ZipFile(archive_path, 'w', allowZip64=True) as zf:
+        for root, dirs, files in os.walk(snapshot_dir):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                arcname = os.path.relpath(path, snapshot_dir).replace(os.sep, '/')
+                compress = zipfile.ZIP_STORED if arcname.startswith('images/') else zipfile.ZIP_DEFLATED
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                info.compress_type = compress
+                with open(path, 'rb') as src, zf.open(info, 'w', force_zip64=True) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+    return archive_path
+
+
+def apply_retention(backups_dir, keep):
+    # Hardlinked files survive as long as any remaining snapshot uses them.
+    # Only complete snapshots (with a manifest) count and are removed; an
+    # interrupted or still running one must not push out a good backup.
+    snapshots = [name for name in list_snapshots(backups_dir)
+                 if os.path.exists(os.path.join(backups_dir, name, MANIFEST_NAME))]
+    for name in snapshots[:-keep] if keep > 0 else []:
+        shutil.rmtree(os.path.join(backups_dir, name))
+        print(f"[OK] Removed old snapshot {name}")
+    kept = set(list_snapshots(backups_dir))
+    for name in os.listdir(backups_dir):
+        if name.startswith('backup-') and name.endswith('.zip') and name[7:-4] not in kept:
+            os.remove(os.path.join(backups_dir, name))
+            print(f"[OK] Removed old archive {name}")
+
+
+def run_backup(db_path, images_src, backups_dir, keep=KEEP_SNAPSHOTS, make_zip=False, images_only=False):
+    # Returns the new snapshot directory, or None when the backup failed. A
+    # failed run leaves no manifest behind and never triggers retention, so it
+    # can't push out a good snapshot.
+    if not images_only and not os.path.exists(db_path):
+        print(f"[ERROR] {db_path} not found; set BLOG_DB or pass --images-only")
+        return None
+
+    os.makedirs(backups_dir, exist_ok=True)
+
+    # Base the new snapshot on the latest complete one
+    previous_dir = previous_manifest = None
+    for name in reversed(list_snapshots(backups_dir)):
+        previous_manifest = load_manifest(os.path.join(backups_dir, name))
+        if previous_manifest is not None:
+            previous_dir = os.path.join(backups_dir, name)
+            break
+
+    # Microseconds keep runs within the same second apart; mkdir without
+    # exist_ok guarantees no two runs ever share a directory
+    while True:
+        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        target_dir = os.path.join(backups_dir, timestamp)
+        try:
+            os.makedirs(target_dir)
+            break
+        except FileExistsError:
+            continue
+
+    try:
+        # Back up database
+        if not images_only:
+            backup_database(db_path, os.path.join(target_dir, 'blog.db'))
+            print(f"[OK] Backed up database to {os.path.join(target_dir, 'blog.db')}")
+
+        # Snapshot images folder (if exists)
+        files = {}
+        if os.path.isdir(images_src):
+            images_dst = os.path.join(target_dir, 'images')
+            os.makedirs(images_dst, exist_ok=True)
+            files, stats = snapshot_images(images_src, images_dst, previous_dir, previous_manifest)
+            print(f"[OK] Snapshot images to {images_dst}: {stats['copied']} copied "
+                  f"({stats['copied_bytes']} bytes), {stats['linked']} unchanged (hardlinked)")
+        else:
+            print("[WARN] static/images/ not found; skipping images backup")
+    except (OSError, sqlite3.Error) as e:
+        print(f"[ERROR] Backup failed: {e}")
+        shutil.rmtree(target_dir, ignore_errors=True)
+        return None
+
+    # Written last: a snapshot without a manifest is never used as a base
+    with open(os.path.join(target_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'created_at': timestamp, 'files': files, 'database': not images_only},
+                  f, indent=2, sort_keys=True)
+
+    if make_zip:
+        archive_path = write_zip(target_dir, os.path.join(backups_dir, f"backup-{timestamp}.zip"))
+        print(f"[OK] Created archive: {archive_path}")
+
+    apply_retention(backups_dir, keep)
+    return target_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Back up the blog database and uploaded images.')
+    parser.add_argument('--keep', type=int, default=KEEP_SNAPSHOTS,
+                        help=f'snapshots to keep (default {KEEP_SNAPSHOTS}, 0 keeps all)')
+    parser.add_argument('--zip', action='store_true',
+                        help='also write a self-contained zip of the new snapshot')
+    parser.add_argument('--images-only', action='store_true',
+                        help='back up only static/images/, without the database')
+    args = parser.parse_args(argv)
+
     # Project root (this file is in scripts/)
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-    db_path = os.path.join(base_dir, 'blog.db')
+    # Same resolution as app.py: a relative BLOG_DB is relative to the working directory
+    db_path = os.path.abspath(os.environ.get('BLOG_DB', 'blog.db'))
     images_src = os.path.join(base_dir, 'static', 'images')
-
     backups_dir = os.path.join(base_dir, 'backups')
-    os.makedirs(backups_dir, exist_ok=True)
 
-    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-    target_dir = os.path.join(backups_dir, timestamp)
-    os.makedirs(target_dir, exist_ok=True)
-
-    # Copy database
-    if os.path.exists(db_path):
-        shutil.copy2(db_path, os.path.join(target_dir, 'blog.db'))
-        print(f"[OK] Copied database to {os.path.join(target_dir, 'blog.db')}")
-    else:
-        print("[WARN] blog.db not found; skipping DB backup")
-
-    # Copy images folder (if exists)
-    if os.path.isdir(images_src):
-        images_dst = os.path.join(target_dir, 'images')
-        shutil.copytree(images_src, images_dst)
-        print(f"[OK] Copied images to {images_dst}")
-    else:
-        print("[WARN] static/images/ not found; skipping images backup")
-
-    # Additionally, create a zip archive of this backup directory for easy download
-    zip_base = os.path.join(backups_dir, f"backup-{timestamp}")
-    archive_path = shutil.make_archive(zip_base, 'zip', target_dir)
-    print(f"[OK] Created archive: {archive_path}")
+    if run_backup(db_path, images_src, backups_dir, args.keep, args.zip, args.images_only) is None:
+        sys.exit(1)
 
     print("[DONE] Backup completed successfully.")
 
@@ -0,0 +1,358 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import generate_data
+
+
+# Project root (this file is in scripts/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+SEARCH_TERMS = ['kitap', 'müzik', 'yolculuk', 'istanbul', 'Işık', 'çalışmak', 'deniz kahve', 'yok-böyle-bir-şey']
+# Differences below this are treated as noise, however large in relative terms
+MIN_LATENCY_DELTA_MS = 1.0
+
+
+def build_scenarios(app, include_admin):
+    # Paths are built with url_for so they follow the app's routes and ADMIN_PREFIX
+    from flask import url_for
+    from app import get_db
+
+    with app.app_context():
+        c = get_db().cursor()
+        c.execute("SELECT id FROM posts WHERE is_deleted = 0 ORDER BY id")
+        post_ids = [row[0] for row in c.fetchall()]
+        c.execute("SELECT COUNT(*) FROM posts WHERE is_deleted = 0")
+        pages = max(1, -(-c.fetchone()[0] // 5))
+    if not post_ids:
+        print("[ERROR] The database has no published posts; generate data first")
+        sys.exit(1)
+
+    with app.test_request_context():
+        index_url = url_for('index')
+        page_urls = [url_for('index', page=page) for page in range(2, min(pages, 20) + 1)] or [index_url]
+        post_urls = [url_for('post_detail', post_id=post_id) for post_id in post_ids]
+        favorites_url = url_for('favorites')
+        search_urls = [url_for('search', q=term) for term in SEARCH_TERMS]
+        scenarios = {
+            'index': lambda rng: index_url,
+            'index_pages': lambda rng: rng.choice(page_urls),
+            'post_detail': lambda rng: rng.choice(post_urls),
+            'favorites': lambda rng: favorites_url,
+            'search': lambda rng: rng.choice(search_urls),
+        }
+        if include_admin:
+            admin = {
+                'admin_dashboard': url_for('admin_dashboard'),
+                'admin_posts': url_for('admin_posts'),
+                'admin_trash': url_for('admin_trash'),
+                'admin_users': url_for('admin_users'),
+            }
+            data_urls = [url_for('admin_posts_data', page=page) for page in range(1, 11)]
+            for name, url in admin.items():
+                scenarios[name] = lambda rng, url=url: url
+            scenarios['admin_posts_data'] = lambda rng: rng.choice(data_urls)
+    return scenarios
+
+
+def admin_cookie(app):
+    # A signed session cookie, as the app would issue after login
+    serializer = app.session_interface.get_signing_serializer(app)
+    return f"{app.config.get('SESSION_COOKIE_NAME', 'session')}={serializer.dumps({'admin_logged_in': True})}"
+
+
+class TestClientTransport:
+    # In-process requests through the Flask test client (no network, no server
+    # threads); admin pages use a second client holding a logged-in session
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def _client(self, admin):
+        key = 'admin_client' if admin else 'client'
+        client = getattr(self.local, key, None)
+        if client is None:
+            client = self.app.test_client()
+            if admin:
+                with client.session_transaction(base_url='https://localhost') as session:
+                    session['admin_logged_in'] = True
+            setattr(self.local, key, client)
+        return client
+
+    def request(self, path, admin):
+        response = self._client(admin).get(path, base_url='https://localhost')
+        response.get_data()
+        return response.status_code
+
+
+class HTTPTransport:
+    # Keep-alive HTTP/1.1 connections, one per worker thread
+    def __init__(self, host, port, cookie):
+        self.host = host
+        self.port = port
+        self.cookie = cookie
+        self.local = threading.local()
+
+    def request(self, path, admin):
+        headers = {'Accept-Encoding': 'gzip'}
+        if admin and self.cookie:
+            headers['Cookie'] = self.cookie
+        for attempt in range(2):
+            conn = getattr(self.local, 'conn', None)
+            if conn is None:
+                conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    self.local.conn = None
+                return response.status
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise
+
+
+def start_server(port, workers, threads, env):
+    command = [sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port),
+               '--workers', str(workers), '--threads', str(threads)]
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            print(f"[ERROR] Server exited with code {process.returncode}")
+            sys.exit(1)
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    print("[ERROR] Server did not start listening within 30 seconds")
+    sys.exit(1)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_scenario(transport, name, make_path, requests, concurrency, warmup, seed):
+    admin = name.startswith('admin_')
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        transport.request(make_path(rng), admin)
+
+    per_worker = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+
+    def worker(index):
+        worker_rng = random.Random(f"{seed}-{name}-{index}")
+        latencies = []
+        errors = 0
+        for _ in range(per_worker[index]):
+            path = make_path(worker_rng)
+            start = time.perf_counter()
+            try:
+                status = transport.request(path, admin)
+            except (http.client.HTTPException, OSError):
+                status = None
+            latencies.append(time.perf_counter() - start)
+            # Nothing here should redirect; an admin redirect means the session was rejected
+            if status is None or status >= 300:
+                errors += 1
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(value for worker_latencies, _ in results for value in worker_latencies)
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in results),
+        'rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    # Returns the regressions; throughput may drop and p99 may grow by at most `tolerance`
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        if previous['rps'] and current['rps'] < previous['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {current['rps']} req/s vs baseline {previous['rps']}")
+        if (current['p99_ms'] > previous['p99_ms'] * (1 + tolerance)
+                and current['p99_ms'] - previous['p99_ms'] >= MIN_LATENCY_DELTA_MS):
+            regressions.append(f"{name}: p99 {current['p99_ms']} ms vs baseline {previous['p99_ms']} ms")
+    return regressions
+
+
+def print_table(results, baseline):
+    previous = (baseline or {}).get('scenarios', {})
+    print(f"{'scenario':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+          f"{'base req/s':>12}{'base p99':>10}")
+    for name, row in results['scenarios'].items():
+        base = previous.get(name, {})
+        print(f"{name:<18}{row['rps']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+              f"{row['errors']:>8}{base.get('rps', '-'):>12}{base.get('p99_ms', '-'):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the public and admin pages against a synthetic database.')
+    parser.add_argument('--db', default=generate_data.DEFAULT_OUTPUT,
+                        help=f'database to benchmark, relative to the project root (default {generate_data.DEFAULT_OUTPUT})')
+    parser.add_argument('--generate', action='store_true', help='(re)generate the database before running')
+    generate_data.add_scale_arguments(parser)
+    parser.add_argument('--mode', choices=['client', 'live'], default='client',
+                        help='client: Flask test client in-process; live: start waitress and use HTTP')
+    parser.add_argument('--url', help='benchmark an already running server (host:port) instead; '
+                                      'admin pages need it to share SECRET_KEY with this process')
+    parser.add_argument('--server-workers', type=int, default=1,
+                        help='serve.py worker processes in live mode (default 1)')
+    parser.add_argument('--server-threads', type=int, default=8,
+                        help='waitress threads per worker in live mode (default 8)')
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario (default 500)')
+    parser.add_argument('--concurrency', type=int, default=4, help='concurrent clients (default 4)')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per scenario (default 20)')
+    parser.add_argument('--scenarios', help='comma-separated subset of scenarios to run')
+    parser.add_argument('--no-admin', action='store_true', help='skip the admin listings')
+    parser.add_argument('--no-page-cache', action='store_true',
+                        help='disable the rendered page cache to measure full renders')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help=f'baseline to compare against (default {DEFAULT_BASELINE})')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative throughput drop / p99 increase (default 0.2)')
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    db_path = os.path.join(BASE_DIR, args.db)
+    if os.path.abspath(db_path) == os.path.join(BASE_DIR, 'blog.db'):
+        print("[ERROR] Benchmarks write view counts; point --db at a synthetic database")
+        sys.exit(1)
+    if args.generate or not os.path.exists(db_path):
+        counts = generate_data.generate(db_path, args)
+        print(f"[OK] Generated {counts['posts']} posts, {counts['post_images']} post images, "
+              f"{counts['favorites']} favorites, {counts['favorite_images']} favorite images")
+
+    # Same settings for this process and a server it starts. The retention sweep
+    # would purge generated trash mid-run, so it is off.
+    os.environ['BLOG_DB'] = db_path
+    os.environ['TRASH_RETENTION_DAYS'] = '0'
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+    if args.no_page_cache:
+        os.environ['PAGE_CACHE_MAX_ENTRIES'] = '0'
+    os.chdir(BASE_DIR)
+    sys.path.insert(0, BASE_DIR)
+    from app import app, view_counter
+
+    include_admin = not args.no_admin
+    scenarios = build_scenarios(app, include_admin)
+    if args.scenarios:
+        wanted = [name.strip() for name in args.scenarios.split(',')]
+        unknown = [name for name in wanted if name not in scenarios]
+        if unknown:
+            print(f"[ERROR] Unknown scenarios: {', '.join(unknown)} (available: {', '.join(scenarios)})")
+            sys.exit(1)
+        scenarios = {name: scenarios[name] for name in wanted}
+
+    cookie = admin_cookie(app)
+    server = None
+    if args.url:
+        host, _, port = args.url.replace('http://', '').rstrip('/').partition(':')
+        transport = HTTPTransport(host, int(port or 80), cookie)
+        mode = 'live'
+    elif args.mode == 'live':
+        port = free_port()
+        server = start_server(port, args.server_workers, args.server_threads, dict(os.environ))
+        transport = HTTPTransport('127.0.0.1', port, cookie)
+        mode = 'live'
+        print(f"[OK] serve.py listening on 127.0.0.1:{port} "
+              f"({args.server_workers} workers x {args.server_threads} threads)")
+    else:
+        transport = TestClientTransport(app)
+        mode = 'client'
+
+    results = {
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'config': {'mode': mode, 'server_workers': args.server_workers if mode == 'live' else None,
+                   'posts': args.posts, 'favorites': args.favorites, 'seed': args.seed,
+                   'requests': args.requests, 'concurrency': args.concurrency,
+                   'page_cache': not args.no_page_cache},
+        'scenarios': {},
+    }
+    try:
+        for name, make_path in scenarios.items():
+            results['scenarios'][name] = run_scenario(transport, name, make_path, args.requests,
+                                                      args.concurrency, args.warmup, args.seed)
+            row = results['scenarios'][name]
+            print(f"[OK] {name}: {row['rps']} req/s, p50 {row['p50_ms']} ms, p99 {row['p99_ms']} ms")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        view_counter.flush()
+
+    baseline_path = os.path.join(BASE_DIR, args.baseline)
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != results['config']:
+            print(f"[WARN] Baseline was recorded with different settings {baseline.get('config')}; not comparing")
+            baseline = None
+
+    print()
+    print_table(results, baseline)
+    print()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"[OK] Wrote results to {args.output}")
+
+    failures = [f"{name}: {row['errors']} failed requests"
+                for name, row in results['scenarios'].items() if row['errors']]
+    if baseline is not None:
+        failures += compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path) or '.', exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"[OK] Saved baseline to {baseline_path}")
+
+    if failures:
+        for failure in failures:
+            print(f"[FAIL] {failure}")
+        sys.exit(1)
+    print("[DONE] Benchmark completed" + (" with no regressions against the baseline." if baseline else "."))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+
+
+# Source assets (relative to static/) that get a fingerprinted build
+ASSETS = ['css/style.css', 'js/script.js']
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+
+def minify_css(source):
+    css = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    # Whitespace around these is never significant in CSS
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip() + '\n'
+
+
+def minify_js(source):
+    # Conservative: drop comments, indentation and blank lines, but keep line
+    # breaks (automatic semicolon insertion) and leave string, template and
+    # regex literals untouched.
+    out = []
+    i = 0
+    n = len(source)
+    prev = ''  # last significant character emitted, used to spot regex literals
+    while i < n:
+        ch = source[i]
+        nxt = source[i + 1] if i + 1 < n else ''
+        if ch in '\'"`':
+            j = i + 1
+            while j < n and source[j] != ch:
+                j += 2 if source[j] == '\\' else 1
+            out.append(source[i:j + 1])
+            prev = ch
+            i = j + 1
+        elif ch == '/' and nxt == '/':
+            while i < n and source[i] != '\n':
+                i += 1
+        elif ch == '/' and nxt == '*':
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif ch == '/' and (prev == '' or prev in '(,=:[!&|?{};+-*%<>~^'):
+            j = i + 1
+            in_class = False
+            while j < n and source[j] != '\n':
+                if source[j] == '\\':
+                    j += 2
+                    continue
+                if source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                elif source[j] == '/' and not in_class:
+                    break
+                j += 1
+            out.append(source[i:j + 1])
+            prev = '/'
+            i = j + 1
+        else:
+            out.append(ch)
+            if not ch.isspace():
+                prev = ch
+            i += 1
+    return _trim_js_lines(''.join(out))
+
+
+def _trim_js_lines(code):
+    # Strip indentation and blank lines, except inside multi-line template literals
+    result = []
+    line_start = True
+    i = 0
+    n = len(code)
+    quote = None
+    while i < n:
+        ch = code[i]
+        if quote:
+            result.append(ch)
+            if ch == '\\' and i + 1 < n:
+                result.append(code[i + 1])
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+            i += 1
+            continue
+        if line_start and ch in ' \t\r':
+            i += 1
+            continue
+        if ch == '\n':
+            # Trim trailing spaces and skip blank lines
+            while result and result[-1] in ' \t\r':
+                result.pop()
+            if result and result[-1] != '\n':
+                result.append('\n')
+            line_start = True
+            i += 1
+            continue
+        line_start = False
+        if ch in '\'"`':
+            quote = ch
+        result.append(ch)
+        i += 1
+    return ''.join(result).strip() + '\n'
+
+
+def build(static_dir):
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    manifest = {}
+    for name in ASSETS:
+        src_path = os.path.join(static_dir, name)
+        with open(src_path, encoding='utf-8') as f:
+            source = f.read()
+        minified = minify_css(source) if name.endswith('.css') else minify_js(source)
+        data = minified.encode('utf-8')
+
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        hashed_name = f"{DIST_DIR}/{stem}.{digest}{ext}"
+        out_path = os.path.join(static_dir, hashed_name)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, 'wb') as f:
+            f.write(data)
+        # mtime=0 keeps the .gz byte-identical between builds
+        with open(out_path + '.gz', 'wb') as raw:
+            with gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=9, mtime=0) as gz:
+                gz.write(data)
+
+        manifest[name] = hashed_name
+        gz_size = os.path.getsize(out_path + '.gz')
+        print(f"[OK] {name}: {len(source.encode('utf-8'))} -> {len(data)} bytes "
+              f"({gz_size} gzip) as {hashed_name}")
+
+    # Older hashed files are left in place: pages rendered before a restart
+    # (or cached by a proxy) may still reference them
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"[OK] Wrote manifest: {manifest_path}")
+    return manifest
+
+
+def main():
+    # Project root (this file is in scripts/)
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    build(os.path.join(base_dir, 'static'))
+    print("[DONE] Assets built. Restart the app to pick up the new manifest.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+
+# Project root (this file is in scripts/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join('benchmarks', 'bench.db')
+
+WORDS = (
+    'bugün yarın hafta ay yıl plan hedef düşünce kitap müzik yazılım proje şehir yol deniz dağ '
+    'sabah akşam gece kahve çay iş okul ders sınav spor koşu yürüyüş film dizi oyun arkadaş aile '
+    'zaman hayat yolculuk deneyim öğrenmek çalışmak başlamak bitirmek değişim alışkanlık günlük '
+    'not fikir soru cevap küçük büyük yeni eski güzel zor kolay önemli ilginç sessiz kalabalık '
+    'istanbul ankara izmir ışık gölge ağaç çiçek yağmur kar rüzgar güneş bulut saat dakika'
+).split()
+CATEGORIES = ['Genel', 'Teknoloji', 'Kitaplar', 'Seyahat', 'Müzik', 'Günlük', 'Spor', 'Film']
+IMAGE_CLASSES = ['', 'wide', 'tall']
+
+
+def sentence(rng, low=6, high=18):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+    return ' '.join(words).capitalize() + rng.choice('...!?')
+
+
+def paragraph(rng):
+    text = ' '.join(sentence(rng) for _ in range(rng.randint(2, 7)))
+    # Sprinkle the inline markup the editor produces
+    words = text.split(' ')
+    for _ in range(rng.randint(0, 3)):
+        i = rng.randrange(len(words))
+        words[i] = rng.choice([f'<strong>{words[i]}</strong>', f'<em>{words[i]}</em>',
+                               f'<a href="https://example.com/{words[i]}">{words[i]}</a>'])
+    return f"<p>{' '.join(words)}</p>"
+
+
+def html_content(rng, paragraphs):
+    parts = []
+    for i in range(paragraphs):
+        if i and rng.random() < 0.2:
+            parts.append(f"<h2>{sentence(rng, 2, 5).rstrip('.!?')}</h2>")
+        if rng.random() < 0.1:
+            items = ''.join(f"<li>{sentence(rng, 3, 8)}</li>" for _ in range(rng.randint(3, 6)))
+            parts.append(f"<ul>{items}</ul>")
+        parts.append(paragraph(rng))
+    return '\n'.join(parts)
+
+
+def image_names(upload_dir):
+    # Reuse real uploads so rendered pages point at existing files
+    try:
+        names = sorted(name for name in os.listdir(upload_dir)
+                       if not name.startswith('.') and os.path.isfile(os.path.join(upload_dir, name)))
+    except OSError:
+        names = []
+    return names or [f"bench-{i}.jpg" for i in range(20)]
+
+
+def timestamp(moment):
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def populate(conn, posts=1000, images_per_post=3, favorites=100, trash_ratio=0.05,
+             paragraphs=8, seed=42, upload_dir=None):
+    from app import index_posts_for_search
+
+    rng = random.Random(seed)
+    images = image_names(upload_dir or os.path.join(BASE_DIR, 'static', 'images'))
+    now = datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=3 * 365)
+    step = (now - start) / max(posts, 1)
+
+    def deleted_at(created):
+        if rng.random() >= trash_ratio:
+            return 0, None
+        return 1, timestamp(created + (now - created) * rng.random())
+
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        post_rows = []
+        for i in range(posts):
+            created = start + step * i + timedelta(seconds=rng.randint(0, 3600))
+            content = html_content(rng, rng.randint(max(1, paragraphs // 2), paragraphs * 2))
+            post_rows.append((sentence(rng, 3, 9).rstrip('.!?'), sentence(rng, 12, 30), content,
+                              rng.choice(CATEGORIES), rng.choice(IMAGE_CLASSES), timestamp(created),
+                              timestamp(created + timedelta(days=rng.randint(0, 30))),
+                              int(rng.paretovariate(1.2) * 10)) + deleted_at(created))
+        c.executemany("""INSERT INTO posts (title, excerpt, content, category, image_class, created_at,
+                                            updated_at, views, is_deleted, deleted_at)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", post_rows)
+        c.execute("SELECT id, created_at FROM posts ORDER BY id DESC LIMIT ?", (posts,))
+        post_ids = c.fetchall()
+
+        image_rows = []
+        for post_id, created_at in post_ids:
+            created = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+            for order in range(rng.randint(0, images_per_post * 2)):
+                image_rows.append((post_id, rng.choice(images), order, created_at) + deleted_at(created))
+        c.executemany("""INSERT INTO post_images (post_id, image_filename, display_order, created_at,
+                                                  is_deleted, deleted_at)
+                         VALUES (?, ?, ?, ?, ?, ?)""", image_rows)
+
+        favorite_rows = []
+        for i in range(favorites):
+            created = start + (now - start) * rng.random()
+            favorite_rows.append((sentence(rng, 2, 6).rstrip('.!?'), sentence(rng, 10, 25),
+                                  rng.choice(CATEGORIES), f"https://example.com/favori/{i}",
+                                  timestamp(created), i) + deleted_at(created))
+        c.executemany("""INSERT INTO favorites (title, description, category, link, created_at,
+                                                display_order, is_deleted, deleted_at)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", favorite_rows)
+        c.execute("SELECT id, created_at FROM favorites ORDER BY id DESC LIMIT ?", (favorites,))
+        favorite_image_rows = []
+        for favorite_id, created_at in c.fetchall():
+            created = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+            for order in range(rng.randint(1, 4)):
+                favorite_image_rows.append((favorite_id, rng.choice(images), order) + deleted_at(created))
+        c.executemany("""INSERT INTO favorite_images (favorite_id, image_filename, display_order,
+                                                      is_deleted, deleted_at)
+                         VALUES (?, ?, ?, ?, ?)""", favorite_image_rows)
+
+        # Daily view history for the dashboard chart
+        live_ids = [post_id for post_id, _ in post_ids[:200]]
+        day_rows = [(timestamp(now - timedelta(days=day))[:10], post_id, rng.randint(1, 50))
+                    for day in range(30) for post_id in rng.sample(live_ids, min(len(live_ids), 20))]
+        c.executemany("INSERT OR IGNORE INTO views_daily (day, post_id, views) VALUES (?, ?, ?)", day_rows)
+        index_posts_for_search(c, [post_id for post_id, _ in post_ids])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    c.execute("PRAGMA optimize")
+    return {'posts': len(post_rows), 'post_images': len(image_rows),
+            'favorites': len(favorite_rows), 'favorite_images': len(favorite_image_rows)}
+
+
+def add_scale_arguments(parser):
+    parser.add_argument('--posts', type=int, default=1000, help='posts to generate (default 1000)')
+    parser.add_argument('--images-per-post', type=int, default=3,
+                        help='average images per post (default 3)')
+    parser.add_argument('--favorites', type=int, default=100, help='favorites to generate (default 100)')
+    parser.add_argument('--trash-ratio', type=float, default=0.05,
+                        help='share of rows generated as trashed (default 0.05)')
+    parser.add_argument('--paragraphs', type=int, default=8,
+                        help='average paragraphs of HTML per post (default 8)')
+    parser.add_argument('--seed', type=int, default=42, help='random seed; same seed, same data')
+
+
+def generate(db_path, args):
+    # The app creates the schema (migrations, triggers, FTS) on import, against BLOG_DB
+    if os.path.exists(db_path):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    os.environ['BLOG_DB'] = db_path
+    os.chdir(BASE_DIR)
+    sys.path.insert(0, BASE_DIR)
+    from app import app, get_db
+
+    with app.app_context():
+        return populate(get_db(), posts=args.posts, images_per_post=args.images_per_post,
+                        favorites=args.favorites, trash_ratio=args.trash_ratio,
+                        paragraphs=args.paragraphs, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic blog database for benchmarks.')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help=f'database to create, relative to the project root (default {DEFAULT_OUTPUT})')
+    parser.add_argument('--force', action='store_true', help='overwrite an existing database')
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    db_path = os.path.join(BASE_DIR, args.output)
+    if os.path.abspath(db_path) == os.path.join(BASE_DIR, 'blog.db'):
+        print("[ERROR] Refusing to overwrite the live blog.db")
+        sys.exit(1)
+    if os.path.exists(db_path) and not args.force:
+        print(f"[ERROR] {db_path} exists; pass --force to replace it")
+        sys.exit(1)
+
+    counts = generate(db_path, args)
+    print(f"[OK] Generated {counts['posts']} posts, {counts['post_images']} post images, "
+          f"{counts['favorites']} favorites, {counts['favorite_images']} favorite images")
+    print(f"[DONE] Synthetic database written to {db_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+
+# Production entry point: waitress serving wsgi.application, optionally in
+# several worker processes sharing one port so requests use every core instead
+# of one GIL-bound process.
+#
+#   python serve.py --workers 4 --threads 8 --port 8080
+#
+# With SO_REUSEPORT (Linux, BSD) each worker binds its own listening socket and
+# the kernel spreads new connections across them. Elsewhere the supervisor binds
+# once and the workers inherit that socket. The supervisor restarts crashed
+# workers, replaces all workers one set at a time on SIGHUP, and on SIGTERM/SIGINT
+# lets every worker drain: stop accepting, finish in-flight requests, then exit.
+# Per-process state (page cache, view counter, metrics) lives in each worker.
+
+def env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the blog with waitress in one or more worker processes.')
+    parser.add_argument('--host', default=os.environ.get('FLASK_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=env_int('FLASK_PORT', 8080))
+    parser.add_argument('--workers', type=int, default=env_int('WEB_WORKERS', os.cpu_count() or 1),
+                        help='worker processes (default: WEB_WORKERS or the CPU count)')
+    parser.add_argument('--threads', type=int, default=env_int('WEB_THREADS', 8),
+                        help='request threads per worker (default 8)')
+    parser.add_argument('--connection-limit', type=int, default=env_int('WEB_CONNECTION_LIMIT', 200),
+                        help='open connections per worker before accepting pauses (default 200)')
+    parser.add_argument('--backlog', type=int, default=env_int('WEB_BACKLOG', 1024),
+                        help='listen() backlog per socket (default 1024)')
+    parser.add_argument('--channel-timeout', type=int, default=env_int('WEB_CHANNEL_TIMEOUT', 60),
+                        help='seconds before an idle connection is closed (default 60)')
+    parser.add_argument('--cleanup-interval', type=int, default=10,
+                        help='seconds between idle connection sweeps (default 10)')
+    parser.add_argument('--graceful-timeout', type=int, default=env_int('WEB_GRACEFUL_TIMEOUT', 30),
+                        help='seconds a draining worker may take before it is killed (default 30)')
+    parser.add_argument('--no-reuseport', action='store_true',
+                        help='share one inherited socket even where SO_REUSEPORT is available')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--fd', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--ready-fd', type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def use_reuseport(args):
+    return hasattr(socket, 'SO_REUSEPORT') and not args.no_reuseport
+
+
+def make_socket(args, reuseport):
+    family = socket.AF_INET6 if ':' in args.host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuseport:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((args.host, args.port))
+    return sock
+
+
+# Worker
+
+def run_worker(args):
+    from waitress import create_server
+    from waitress import wasyncore
+
+    if args.fd is not None:
+        sock = socket.socket(fileno=args.fd)
+    else:
+        sock = make_socket(args, use_reuseport(args))
+
+    from wsgi import application
+    server = create_server(
+        application,
+        sockets=[sock],
+        threads=args.threads,
+        connection_limit=args.connection_limit,
+        backlog=args.backlog,
+        channel_timeout=args.channel_timeout,
+        cleanup_interval=args.cleanup_interval,
+        asyncore_use_poll=True,  # select() stops working past 1024 descriptors
+        ident='blog',
+    )
+
+    state = {'draining': False, 'deadline': None}
+
+    def drain(signum, frame):
+        if state['draining']:
+            return
+        state['draining'] = True
+        state['deadline'] = time.monotonic() + args.graceful_timeout
+        # Stop accepting; with SO_REUSEPORT new connections go to the other workers
+        wasyncore.dispatcher.close(server)
+
+    signal.signal(signal.SIGTERM, drain)
+    signal.signal(signal.SIGINT, drain)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)  # reloads are the supervisor's job
+
+    print(f"[OK] Worker {os.getpid()} serving on {args.host}:{args.port} ({args.threads} threads)", flush=True)
+    if args.ready_fd is not None:
+        # Tell a reloading supervisor this worker is listening
+        os.write(args.ready_fd, b'.')
+        os.close(args.ready_fd)
+    # waitress's own run() loop, with a drain check between iterations
+    while True:
+        wasyncore.loop(timeout=1.0, map=server._map, use_poll=True, count=1)
+        if not state['draining']:
+            continue
+        # Close keep-alive connections as soon as they have no request in flight
+        for channel in list(server.active_channels.values()):
+            if not channel.requests:
+                channel.will_close = True
+        busy = [channel for channel in server.active_channels.values() if channel.requests]
+        if not busy or time.monotonic() >= state['deadline']:
+            break
+
+    server.task_dispatcher.shutdown(cancel_pending=True, timeout=5)
+    wasyncore.close_all(server._map)
+    print(f"[OK] Worker {os.getpid()} drained", flush=True)
+    # A normal exit, so the app's atexit hooks flush buffered view counts
+
+
+# Supervisor
+
+class Supervisor:
+    RESTART_DELAY_MAX = 30
+
+    def __init__(self, args):
+        self.args = args
+        self.workers = {}  # pid -> (process, started_at)
+        self.stopping = False
+        self.reload_requested = False
+        self.restart_delay = 0.5
+        self.reuseport = use_reuseport(args)
+        # Bind up front so a busy port fails here, once, instead of in every worker.
+        # With SO_REUSEPORT the socket only reserves the port (it never listens,
+        # so the kernel never hands it connections).
+        self.sock = make_socket(args, self.reuseport)
+        if not self.reuseport:
+            self.sock.listen(args.backlog)
+
+    def spawn(self, ready_fd=None):
+        command = [sys.executable, os.path.abspath(__file__), '--worker'] + sys.argv[1:]
+        pass_fds = []
+        if not self.reuseport:
+            command += ['--fd', str(self.sock.fileno())]
+            pass_fds.append(self.sock.fileno())
+        if ready_fd is not None:
+            command += ['--ready-fd', str(ready_fd)]
+            pass_fds.append(ready_fd)
+        process = subprocess.Popen(command, pass_fds=pass_fds)
+        self.workers[process.pid] = (process, time.monotonic())
+        return process
+
+    def terminate(self, processes):
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        for process in processes:
+            try:
+                process.wait(timeout=max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                print(f"[WARN] Worker {process.pid} did not drain in time; killing it", flush=True)
+                process.kill()
+                process.wait()
+
+    def reload(self):
+        # Start a fresh set next to the old one and drain the old one once the
+        # new workers listen, so the port never goes unserved
+        old = [process for process, _ in self.workers.values()]
+        read_fd, write_fd = os.pipe()
+        for _ in range(self.args.workers):
+            self.spawn(ready_fd=write_fd)
+        os.close(write_fd)
+        ready = 0
+        deadline = time.monotonic() + 60
+        while ready < self.args.workers and time.monotonic() < deadline:
+            if select.select([read_fd], [], [], 1)[0]:
+                data = os.read(read_fd, 64)
+                if not data:
+                    break  # every new worker has exited or reported in
+                ready += len(data)
+        os.close(read_fd)
+        if ready < self.args.workers:
+            print(f"[WARN] Only {ready} of {self.args.workers} new workers reported ready", flush=True)
+        for process in old:
+            self.workers.pop(process.pid, None)
+        self.terminate(old)
+        print(f"[OK] Reloaded {self.args.workers} workers", flush=True)
+
+    def reap(self):
+        for pid, (process, started_at) in list(self.workers.items()):
+            code = process.poll()
+            if code is None:
+                continue
+            del self.workers[pid]
+            if self.stopping:
+                continue
+            # Back off when workers die right after starting (bad config, import error)
+            if time.monotonic() - started_at < 5:
+                time.sleep(self.restart_delay)
+                self.restart_delay = min(self.restart_delay * 2, self.RESTART_DELAY_MAX)
+            else:
+                self.restart_delay = 0.5
+            replacement = self.spawn()
+            print(f"[WARN] Worker {pid} exited with code {code}; started {replacement.pid}", flush=True)
+
+    def run(self):
+        def stop(signum, frame):
+            self.stopping = True
+
+        def request_reload(signum, frame):
+            self.reload_requested = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGHUP, request_reload)
+
+        mode = 'SO_REUSEPORT' if self.reuseport else 'shared socket'
+        print(f"[OK] Supervisor {os.getpid()} starting {self.args.workers} workers on "
+              f"{self.args.host}:{self.args.port} ({mode})", flush=True)
+        for _ in range(self.args.workers):
+            self.spawn()
+
+        while not self.stopping:
+            time.sleep(0.5)
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+            self.reap()
+
+        print("[OK] Shutting down; draining workers", flush=True)
+        self.terminate([process for process, _ in self.workers.values()])
+        self.sock.close()
+        print("[DONE] All workers stopped.", flush=True)
+
+
+def main():
+    args = parse_args()
+    if args.worker or args.workers <= 1:
+        run_worker(args)
+    else:
+        Supervisor(args).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+
+# The app reads its configuration at import, so the environment is set up
+# before it is imported: a throwaway database, no background task threads
+# (tests run queued jobs themselves) and no automatic trash purge.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_tmp = tempfile.mkdtemp(prefix='blog-tests-')
+os.environ['BLOG_DB'] = os.path.join(_tmp, 'import.db')
+os.environ['TASK_WORKERS'] = '0'
+os.environ['TRASH_RETENTION_DAYS'] = '0'
+os.environ['VIEW_FLUSH_INTERVAL'] = '3600'
+os.environ['SECRET_KEY'] = 'test-secret'
+os.environ['TEMPLATE_CACHE_DIR'] = os.path.join(_tmp, 'jinja')
+os.environ.pop('ADMIN_ACCESS_CODE', None)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))  # standalone scripts import by name
+os.chdir(_tmp)  # the app creates its relative upload folder at import
+
+import app as blog  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    # A fresh, fully migrated database per test
+    blog.close_db_pool()
+    blog.app.config.update(
+        TESTING=True,
+        DATABASE=str(tmp_path / 'blog.db'),
+        UPLOAD_FOLDER=str(tmp_path / 'images'),
+        SESSION_COOKIE_SECURE=False,
+    )
+    os.makedirs(blog.app.config['UPLOAD_FOLDER'])
+    blog.init_db()
+    blog.page_cache.clear()
+    blog.published_content.__init__()
+    blog.view_counter._reset_after_fork()
+    yield blog.app
+    blog.close_db_pool()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(app):
+    # A separate client, so its flash messages never reach public requests
+    admin_client = app.test_client()
+    with admin_client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    return admin_client
+
+
+@pytest.fixture
+def create_post(admin):
+    # Saves a post through the admin form and returns its id
+    def create(title, **fields):
+        data = {'title': title, 'excerpt': f'{title} excerpt', 'content': f'<p>{title} content</p>',
+                'category': 'Genel'}
+        data.update(fields)
+        admin.post(f'{blog.ADMIN_PREFIX}/posts/save', data=data)
+        with blog.app.app_context():
+            return blog.get_db().execute("SELECT MAX(id) FROM posts WHERE title = ?", (title,)).fetchone()[0]
+    return create
+
+
+@pytest.fixture
+def db(app):
+    with app.app_context():
+        yield blog.get_db()
+
+
+@pytest.fixture
+def run_tasks(app):
+    # Run every queued background job to completion
+    def run():
+        with app.app_context():
+            while blog.task_executor.run_next():
+                pass
+    return run
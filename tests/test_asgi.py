@@ -0,0 +1,66 @@
+import asyncio
+
+import asgi
+import app as blog
+
+
+def call(application, scope, messages):
+    sent = []
+    incoming = iter(messages)
+
+    async def receive():
+        return next(incoming, {'type': 'http.disconnect'})
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+def http(method, path, body_chunks=(b'',), headers=()):
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+             'headers': [(name.encode(), value.encode()) for name, value in headers]}
+    messages = [{'type': 'http.request', 'body': chunk, 'more_body': i < len(body_chunks) - 1}
+                for i, chunk in enumerate(body_chunks)]
+    sent = call(asgi.ReadPathApplication(), scope, messages)
+    return sent[0], b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def test_public_page_is_served_on_the_read_path(app, create_post):
+    post_id = create_post('ASGI yazısı')
+    assert asgi._is_read_request({'method': 'GET', 'path': f'/post/{post_id}'})
+    assert not asgi._is_read_request({'method': 'POST', 'path': f'{blog.ADMIN_PREFIX}/posts/save'})
+
+    start, body = http('GET', f'/post/{post_id}')
+    assert start['status'] == 200
+    assert 'ASGI yazısı' in body.decode('utf-8')
+
+
+def test_chunked_body_over_the_limit_is_refused(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', 1000)
+    start, body = http('POST', f'{blog.ADMIN_PREFIX}/posts/save', body_chunks=[b'x' * 600, b'x' * 600],
+                       headers=[('content-type', 'application/x-www-form-urlencoded')])
+    assert start['status'] == 413
+    assert (b'connection', b'close') in start['headers']
+    assert body == b'Request Entity Too Large'
+
+
+def test_body_within_the_limit_reaches_the_app(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', 1000)
+    # Both fields arrive (a missing one would be a 400); bad credentials redirect back
+    start, _ = http('POST', f'{blog.ADMIN_PREFIX}/login', body_chunks=[b'username=a&', b'password=b'],
+                    headers=[('content-type', 'application/x-www-form-urlencoded')])
+    assert start['status'] == 302
+
+
+def test_lifespan_shutdown_flushes_pending_views(app, db, create_post):
+    post_id = create_post('Kapanış')
+    blog.view_counter.hit(post_id)
+    blog.view_counter.hit(post_id)
+
+    sent = call(asgi.ReadPathApplication(), {'type': 'lifespan'},
+                [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+    assert [message['type'] for message in sent] == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+    assert blog.view_counter.pending_total() == 0
+    assert db.execute("SELECT views FROM posts WHERE id = ?", (post_id,)).fetchone()[0] == 2
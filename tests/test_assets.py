@@ -0,0 +1,80 @@
+import gzip
+import json
+import os
+
+import build_assets
+
+import app as blog
+
+
+CSS = """/* header */
+.site-header {
+    color: #333;
+    margin: 0 auto;
+}
+"""
+
+JS = """// toggles the menu
+const pattern = /a\\/b/g;
+function toggle(menu) {
+    const label = "keep // this";
+    return menu.classList.toggle('open');
+}
+"""
+
+
+def build(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'css').mkdir(parents=True)
+    (static / 'js').mkdir()
+    (static / 'css' / 'style.css').write_text(CSS, encoding='utf-8')
+    (static / 'js' / 'script.js').write_text(JS, encoding='utf-8')
+    return str(static), build_assets.build(str(static))
+
+
+def test_build_writes_hashed_minified_files_and_a_manifest(tmp_path):
+    static, manifest = build(tmp_path)
+
+    with open(os.path.join(static, 'dist', 'manifest.json'), encoding='utf-8') as f:
+        assert json.load(f) == manifest
+    css_path = os.path.join(static, manifest['css/style.css'])
+    with open(css_path, encoding='utf-8') as f:
+        assert f.read() == '.site-header{color:#333;margin:0 auto}\n'
+    with open(css_path, 'rb') as raw, gzip.open(css_path + '.gz') as gz:
+        assert gz.read() == raw.read()
+
+    with open(os.path.join(static, manifest['js/script.js']), encoding='utf-8') as f:
+        js = f.read()
+    assert 'toggles the menu' not in js
+    assert '/a\\/b/g' in js
+    assert '"keep // this"' in js
+
+
+def test_rebuild_is_byte_identical(tmp_path):
+    static, first = build(tmp_path)
+    with open(os.path.join(static, first['css/style.css'] + '.gz'), 'rb') as f:
+        first_gz = f.read()
+    second = build_assets.build(static)
+    assert second == first
+    with open(os.path.join(static, second['css/style.css'] + '.gz'), 'rb') as f:
+        assert f.read() == first_gz
+
+
+def test_templates_link_the_built_files_and_serve_them_gzipped(app, client, tmp_path, monkeypatch):
+    static, manifest = build(tmp_path)
+    monkeypatch.setattr(app, 'static_folder', static)
+    monkeypatch.setattr(blog, '_asset_manifest', manifest)
+    monkeypatch.setattr(blog, 'DEBUG', False)
+
+    with app.test_request_context():
+        url = blog.static_url('css/style.css')
+    assert url == f"/static/{manifest['css/style.css']}"
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert gzip.decompress(response.get_data()).startswith(b'.site-header{')
+
+    plain = client.get(url)
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data().startswith(b'.site-header{')
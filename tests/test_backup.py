@@ -0,0 +1,71 @@
+import os
+import sqlite3
+
+import pytest
+
+import backup
+
+
+@pytest.fixture
+def site(tmp_path):
+    db_path = str(tmp_path / 'blog.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE posts (id INTEGER PRIMARY KEY, title TEXT)")
+    conn.execute("INSERT INTO posts (title) VALUES ('Yedek')")
+    conn.commit()
+    conn.close()
+    images = tmp_path / 'images'
+    images.mkdir()
+    (images / 'a.jpg').write_bytes(b'a' * 100)
+    return db_path, str(images), str(tmp_path / 'backups')
+
+
+def complete_snapshots(backups_dir):
+    return [name for name in backup.list_snapshots(backups_dir)
+            if os.path.exists(os.path.join(backups_dir, name, backup.MANIFEST_NAME))]
+
+
+def test_snapshots_reuse_unchanged_images(site):
+    db_path, images, backups_dir = site
+    first = backup.run_backup(db_path, images, backups_dir)
+    second = backup.run_backup(db_path, images, backups_dir)
+
+    assert first != second  # same-second runs get their own directory
+    assert os.path.samefile(os.path.join(first, 'images', 'a.jpg'), os.path.join(second, 'images', 'a.jpg'))
+    conn = sqlite3.connect(os.path.join(second, 'blog.db'))
+    assert conn.execute("SELECT title FROM posts").fetchall() == [('Yedek',)]
+    conn.close()
+
+
+def test_retention_keeps_the_newest_complete_snapshots(site):
+    db_path, images, backups_dir = site
+    made = [backup.run_backup(db_path, images, backups_dir, keep=2) for _ in range(3)]
+    # An interrupted run has no manifest and neither counts nor gets removed
+    os.makedirs(os.path.join(backups_dir, '00000000-000000-000000'))
+    backup.apply_retention(backups_dir, 2)
+
+    assert complete_snapshots(backups_dir) == [os.path.basename(path) for path in made[1:]]
+    assert '00000000-000000-000000' in backup.list_snapshots(backups_dir)
+
+
+def test_missing_database_fails_without_touching_snapshots(site, tmp_path):
+    db_path, images, backups_dir = site
+    kept = [backup.run_backup(db_path, images, backups_dir, keep=2) for _ in range(2)]
+
+    assert backup.run_backup(str(tmp_path / 'missing.db'), images, backups_dir, keep=2) is None
+    assert complete_snapshots(backups_dir) == [os.path.basename(path) for path in kept]
+
+
+def test_missing_database_exits_non_zero(monkeypatch, tmp_path):
+    monkeypatch.setenv('BLOG_DB', str(tmp_path / 'missing.db'))
+    with pytest.raises(SystemExit) as exc:
+        backup.main([])
+    assert exc.value.code == 1
+
+
+def test_images_only_backup_skips_the_database(site, tmp_path):
+    _, images, backups_dir = site
+    snapshot = backup.run_backup(str(tmp_path / 'missing.db'), images, backups_dir, images_only=True)
+
+    assert not os.path.exists(os.path.join(snapshot, 'blog.db'))
+    assert backup.load_manifest(snapshot)['files'].keys() == {'a.jpg'}
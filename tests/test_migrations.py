@@ -0,0 +1,118 @@
+import sqlite3
+
+import app as blog
+
+
+# Schema of a blog.db created before versioned migrations existed
+BASELINE_SCHEMA = '''
+CREATE TABLE posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    excerpt TEXT,
+    content TEXT NOT NULL,
+    category TEXT,
+    image_filename TEXT,
+    image_class TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    views INTEGER DEFAULT 0,
+    is_deleted INTEGER DEFAULT 0,
+    deleted_at TIMESTAMP);
+CREATE TABLE admin_users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL);
+CREATE TABLE media_files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL,
+    original_name TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    file_size INTEGER,
+    uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE favorites (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    category TEXT,
+    link TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    display_order INTEGER DEFAULT 0,
+    is_deleted INTEGER DEFAULT 0,
+    deleted_at TIMESTAMP);
+CREATE TABLE favorite_images (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    favorite_id INTEGER NOT NULL,
+    image_filename TEXT NOT NULL,
+    display_order INTEGER DEFAULT 0,
+    is_deleted INTEGER DEFAULT 0,
+    deleted_at TIMESTAMP,
+    FOREIGN KEY (favorite_id) REFERENCES favorites (id) ON DELETE CASCADE);
+CREATE TABLE post_images (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id INTEGER NOT NULL,
+    image_filename TEXT NOT NULL,
+    display_order INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_deleted INTEGER DEFAULT 0,
+    deleted_at TIMESTAMP,
+    FOREIGN KEY (post_id) REFERENCES posts (id) ON DELETE CASCADE);
+CREATE TABLE media (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL,
+    original_name TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    file_size INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_deleted INTEGER DEFAULT 0,
+    deleted_at TIMESTAMP);
+'''
+
+
+def baseline_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany("INSERT INTO posts (title, excerpt, content, category, views, is_deleted) VALUES (?, ?, ?, ?, ?, ?)", [
+        ('Eski Yazı', 'özet', '<p>Çalışma günlüğü</p>', 'Günlük', 5, 0),
+        ('Gezi Notları', 'yol', '<p>Kapadokya</p>', 'Gezi', 7, 0),
+        ('Silinmiş', '', '<p>çöp</p>', 'Gezi', 3, 1),
+    ])
+    conn.execute("INSERT INTO post_images (post_id, image_filename) VALUES (1, 'old.jpg')")
+    conn.execute("INSERT INTO favorites (title, category) VALUES ('Kitap', 'Okuma')")
+    conn.commit()
+    conn.close()
+
+
+def test_migrations_upgrade_an_existing_database(app, tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    baseline_db(path)
+    blog.close_db_pool()
+    app.config['DATABASE'] = path
+
+    blog.init_db()
+    blog.init_db()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == blog.SCHEMA_VERSION
+    rows = conn.execute("SELECT id, title, content, category, views, is_deleted FROM posts ORDER BY id").fetchall()
+    assert rows == [
+        (1, 'Eski Yazı', '<p>Çalışma günlüğü</p>', 'Günlük', 5, 0),
+        (2, 'Gezi Notları', '<p>Kapadokya</p>', 'Gezi', 7, 0),
+        (3, 'Silinmiş', '<p>çöp</p>', 'Gezi', 3, 1),
+    ]
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(posts)")]
+    assert columns[-1] == 'content'
+    assert conn.execute("SELECT image_filename FROM post_images").fetchall() == [('old.jpg',)]
+    assert conn.execute("SELECT title FROM favorites").fetchall() == [('Kitap',)]
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    conn.close()
+
+    with app.app_context():
+        c = blog.get_db().cursor()
+        counters = blog.get_counters(c, ['published_posts', 'published_views', 'trashed_items'])
+        assert counters == {'published_posts': 2, 'published_views': 12, 'trashed_items': 1}
+        stats = dict(c.execute("SELECT category, posts FROM category_stats WHERE posts > 0").fetchall())
+        assert stats == {'Günlük': 1, 'Gezi': 1}
+
+    client = app.test_client()
+    assert b'/post/1' in client.get('/search?q=calisma').data
+    assert b'/post/3' not in client.get('/search?q=cop').data
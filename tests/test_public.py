@@ -0,0 +1,125 @@
+import app as blog
+
+
+FUTURE = 'Fri, 01 Jan 2100 00:00:00 GMT'
+
+
+def insert_posts(db, count):
+    # Distinct timestamps, plus two posts sharing one to exercise the id tiebreak
+    ids = []
+    for i in range(count):
+        created = f"2024-01-{1 + min(i, count - 2):02d} 10:00:00"
+        cursor = db.execute("INSERT INTO posts (title, excerpt, content, created_at) VALUES (?, '', '', ?)",
+                            (f'Post {i}', created))
+        ids.append(cursor.lastrowid)
+    blog.content_changed(db.cursor())
+    db.commit()
+    return ids
+
+
+def test_conditional_get_for_live_post(client, create_post):
+    post_id = create_post('Canlı')
+    first = client.get(f'/post/{post_id}')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    assert client.get(f'/post/{post_id}', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(f'/post/{post_id}', headers={'If-Modified-Since': FUTURE}).status_code == 304
+    assert blog.view_counter.pending(post_id) == 3
+
+
+def test_conditional_get_never_answers_for_missing_resources(client, admin, create_post):
+    post_id = create_post('Silinecek')
+    etag = client.get(f'/post/{post_id}').headers['ETag']
+    admin.post(f'{blog.ADMIN_PREFIX}/posts/delete/{post_id}')
+    blog.view_counter._reset_after_fork()
+
+    for headers in ({'If-None-Match': etag}, {'If-Modified-Since': FUTURE}):
+        assert client.get('/post/999999', headers=headers).status_code == 404
+        assert client.get(f'/post/{post_id}', headers=headers).status_code == 404
+        assert client.get('/search', headers=headers).status_code == 302
+        assert client.get('/search?q=', headers=headers).status_code == 302
+    assert blog.view_counter.pending_total() == 0
+
+
+def test_view_flush_records_live_posts_only(client, admin, db, create_post):
+    post_id = create_post('Okunan')
+    trashed_id = create_post('Çöpte')
+    admin.post(f'{blog.ADMIN_PREFIX}/posts/delete/{trashed_id}')
+    for target in (post_id, post_id, trashed_id, 999999):
+        blog.view_counter.hit(target)
+
+    assert blog.view_counter.flush() == 4
+    rows = db.execute("SELECT post_id, views FROM views_daily").fetchall()
+    assert [tuple(row) for row in rows] == [(post_id, 2)]
+    assert db.execute("SELECT views FROM posts WHERE id = ?", (post_id,)).fetchone()[0] == 2
+    assert blog.get_counter(db.cursor(), 'published_views') == 2
+
+
+def test_keyset_pages_walk_the_listing_in_order(app, db):
+    ids = insert_posts(db, 12)
+    with app.test_request_context():
+        snapshot = blog.published_content.current()
+        expected = [post.id for post in snapshot.by_date]
+        assert set(ids) <= set(expected)
+
+        seen = []
+        posts, has_more = blog._page_of_posts(snapshot, 1)
+        seen.extend(post.id for post in posts)
+        while has_more:
+            posts, has_more = blog._page_of_posts(snapshot, 2, after=seen[-1])
+            seen.extend(post.id for post in posts)
+        assert seen == expected
+
+        # A "before" cursor gives back the page preceding it
+        page_two, _ = blog._page_of_posts(snapshot, 2, after=expected[blog.POSTS_PER_PAGE - 1])
+        page_one, has_more = blog._page_of_posts(snapshot, 1, before=page_two[0].id)
+        assert [post.id for post in page_one] == expected[:blog.POSTS_PER_PAGE]
+        assert has_more
+
+
+def test_keyset_cursor_of_unpublished_post_falls_back_to_page_number(client, db):
+    insert_posts(db, 12)
+    gone = db.execute("SELECT id FROM posts ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET 4").fetchone()[0]
+    db.execute("UPDATE posts SET is_deleted = 1 WHERE id = ?", (gone,))
+    blog.content_changed(db.cursor())
+    db.commit()
+
+    by_cursor = client.get(f'/page/2?after={gone}')
+    by_number = client.get('/page/2')
+    assert by_cursor.status_code == by_number.status_code == 200
+    assert by_cursor.data == by_number.data
+
+
+def test_search_matches_folded_turkish_text(client, create_post):
+    post_id = create_post('Şahane Işıklar', content='<p>İstanbul <strong>gecesi</strong></p>')
+    assert f'/post/{post_id}'.encode() in client.get('/search?q=sahane isik').data
+    assert f'/post/{post_id}'.encode() in client.get('/search?q=ISTANBUL').data
+    assert f'/post/{post_id}'.encode() not in client.get('/search?q=strong').data
+
+
+def test_snapshot_keeps_summaries_and_detail_reads_the_body(app, client, create_post):
+    post_id = create_post('Gövde', content='<p>Uzun gövde metni</p>')
+    with app.test_request_context():
+        snapshot = blog.published_content.current()
+        assert isinstance(snapshot.posts[post_id], blog.PostSummary)
+        assert 'content' not in snapshot.posts[post_id]._fields
+
+    assert 'Uzun gövde metni' in client.get(f'/post/{post_id}').get_data(as_text=True)
+    assert 'Uzun <mark>gövde</mark> <mark>metni</mark>' in client.get('/search?q=govde metni').get_data(as_text=True)
+
+
+def test_search_results_follow_flushed_view_counts(client, create_post):
+    post_id = create_post('Sayılan')
+    first = client.get('/search?q=sayilan')
+    assert '0 görüntüleme' in first.get_data(as_text=True)
+
+    for _ in range(3):
+        blog.view_counter.hit(post_id)
+    blog.view_counter.flush()
+    blog.published_content.invalidate()  # flushed on this thread's own connection
+
+    stale = client.get('/search?q=sayilan', headers={'If-None-Match': first.headers['ETag']})
+    assert stale.status_code == 200
+    assert '3 görüntüleme' in stale.get_data(as_text=True)
+    assert 'Last-Modified' not in stale.headers
@@ -0,0 +1,54 @@
+import json
+
+import app as blog
+
+
+SCAN_SQL = "SELECT id FROM posts WHERE title = ?"
+
+
+def test_slow_statements_are_logged_with_plan_and_parameter_types(app, db, monkeypatch, tmp_path):
+    log_file = tmp_path / 'slow.jsonl'
+    monkeypatch.setitem(app.config, 'SLOW_QUERY_MS', 1e-9)
+    monkeypatch.setitem(app.config, 'SLOW_QUERY_LOG_FILE', str(log_file))
+    blog.query_log.reset()
+
+    db.execute(SCAN_SQL, ('gizli başlık',)).fetchall()
+    db.execute(SCAN_SQL, ('başka',)).fetchall()
+
+    [offender] = [o for o in blog.query_log.report()['offenders'] if o['sql'] == SCAN_SQL]
+    assert offender['calls'] == offender['slow_calls'] == 2
+    assert offender['params'] == '(str)'
+    assert any(detail.startswith('SCAN posts') for detail in offender['scans'])
+
+    events = [json.loads(line) for line in log_file.read_text(encoding='utf-8').splitlines()]
+    logged = [event for event in events if event['sql'] == SCAN_SQL]
+    assert len(logged) == 2
+    assert logged[0]['plan'] == offender['plan']
+    assert 'gizli' not in log_file.read_text(encoding='utf-8')  # values are never logged
+
+
+def test_threshold_zero_only_tallies(app, db, monkeypatch):
+    monkeypatch.setitem(app.config, 'SLOW_QUERY_MS', 0)
+    blog.query_log.reset()
+    db.execute(SCAN_SQL, ('x',)).fetchall()
+
+    assert blog.query_log.statements[SCAN_SQL].calls == 1
+    assert blog.query_log.slow_total() == 0
+    assert blog.query_log.report()['recent'] == []
+
+
+def test_plan_scans_flags_table_scans_and_temp_sorts():
+    plan = ['SCAN posts', 'SEARCH posts USING INDEX idx_posts_published (is_deleted=?)',
+            'SCAN posts USING COVERING INDEX idx_posts_published', 'SCAN posts_fts VIRTUAL TABLE INDEX 0:M1',
+            'USE TEMP B-TREE FOR ORDER BY']
+    assert blog._plan_scans(plan) == ['SCAN posts', 'USE TEMP B-TREE FOR ORDER BY']
+
+
+def test_admin_report_lists_offenders(app, admin, db, monkeypatch):
+    monkeypatch.setitem(app.config, 'SLOW_QUERY_MS', 1e-9)
+    blog.query_log.reset()
+    db.execute(SCAN_SQL, ('x',)).fetchall()
+
+    response = admin.get(f'{blog.ADMIN_PREFIX}/slow-queries')
+    assert response.status_code == 200
+    assert 'SELECT id FROM posts WHERE title = ?' in response.get_data(as_text=True)
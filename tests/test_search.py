@@ -0,0 +1,37 @@
+import sqlite3
+
+import pytest
+
+import app as blog
+
+
+def test_rebuild_indexes_posts_written_outside_the_app(app, client, db):
+    # Another client (the sqlite3 shell, a script) can write posts without the app's functions
+    other = sqlite3.connect(app.config['DATABASE'])
+    post_id = other.execute("INSERT INTO posts (title, excerpt, content) VALUES ('Dışarıdan', '', '<p>Kapadokya</p>')").lastrowid
+    other.commit()
+    other.close()
+    link = f'/post/{post_id}'
+    assert link not in client.get('/search?q=kapadokya').get_data(as_text=True)
+
+    result = app.test_cli_runner().invoke(args=['rebuild-search-index'])
+    published = blog.get_counter(db.cursor(), 'published_posts')
+    assert f'[OK] Indexed {published} published posts' in result.output
+    blog.page_cache.clear()
+    assert link in client.get('/search?q=kapadokya').get_data(as_text=True)
+
+
+def test_missing_index_is_skipped(db):
+    db.execute("DROP TRIGGER posts_fts_trash")
+    db.execute("DROP TABLE posts_fts")
+    post_id = db.execute("INSERT INTO posts (title, content) VALUES ('FTS yok', '')").lastrowid
+    blog.index_posts_for_search(db.cursor(), [post_id])
+
+
+def test_other_index_errors_are_raised(db):
+    db.execute("DROP TRIGGER posts_fts_trash")
+    db.execute("DROP TABLE posts_fts")
+    db.execute("CREATE TABLE posts_fts (unrelated TEXT)")
+    post_id = db.execute("INSERT INTO posts (title, content) VALUES ('Bozuk', '')").lastrowid
+    with pytest.raises(sqlite3.OperationalError):
+        blog.index_posts_for_search(db.cursor(), [post_id])
@@ -0,0 +1,62 @@
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+from conftest import ROOT
+
+pytest.importorskip('waitress')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_serving(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        assert process.poll() is None, process.communicate()[0]
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/hakkimda', timeout=2) as response:
+                return response.status
+        except OSError:
+            time.sleep(0.2)
+    raise AssertionError('server did not start')
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_sigterm_drains_workers_and_flushes_views(app, tmp_path, workers, create_post):
+    post_id = create_post('Sunucu')
+
+    port = free_port()
+    env = dict(os.environ, BLOG_DB=app.config['DATABASE'], TASK_WORKERS='0', VIEW_FLUSH_INTERVAL='3600')
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'serve.py'), '--host', '127.0.0.1',
+                                '--port', str(port), '--workers', str(workers), '--threads', '2',
+                                '--graceful-timeout', '5'],
+                               cwd=str(tmp_path), env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True)
+    try:
+        assert wait_until_serving(port, process) == 200
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/post/{post_id}', timeout=5) as response:
+            assert response.status == 200
+        process.send_signal(signal.SIGTERM)
+        output = process.communicate(timeout=30)[0]
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.communicate()
+
+    assert process.returncode == 0, output
+    assert 'drained' in output
+    # Buffered views are written by the worker's exit hooks, not lost
+    conn = sqlite3.connect(app.config['DATABASE'])
+    assert conn.execute("SELECT views FROM posts WHERE id = ?", (post_id,)).fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,65 @@
+import app as blog
+
+
+def add_job(db, status, age_days=0, last_error=None):
+    return db.execute("""INSERT INTO jobs (kind, status, last_error, updated_at)
+                         VALUES ('noop', ?, ?, datetime('now', ?))""",
+                      (status, last_error, f'-{age_days} days')).lastrowid
+
+
+def test_prune_drops_only_old_finished_jobs(app, db):
+    old_done = add_job(db, 'done', age_days=30)
+    recent_done = add_job(db, 'done', age_days=1)
+    old_failed = add_job(db, 'failed', age_days=30, last_error='boom')
+    db.commit()
+
+    blog._prune_jobs_task({})
+    remaining = {row[0] for row in db.execute("SELECT id FROM jobs WHERE kind = 'noop'")}
+    assert remaining == {recent_done, old_failed}
+    assert old_done not in remaining
+
+
+def test_stats_list_only_jobs_that_need_attention(app, db):
+    add_job(db, 'done')
+    failed = add_job(db, 'failed', last_error='boom')
+    retrying = add_job(db, 'pending', last_error='busy')
+    db.execute("UPDATE jobs SET run_after = run_after + 3600 WHERE id = ?", (retrying,))
+    db.commit()
+
+    stats = blog.task_executor.stats(db.cursor())
+    assert [job['id'] for job in stats['recent']] == [retrying, failed]
+    assert stats['counts']['done'] == 1
+    assert stats['counts']['scheduled'] == 1
+
+
+def test_periodic_prune_is_scheduled(client, db, run_tasks):
+    client.get('/')
+    run_tasks()
+    kinds = {row[0] for row in db.execute("SELECT kind FROM jobs WHERE status = 'pending'")}
+    assert 'prune_jobs' in kinds
+
+
+def test_status_counts_follow_the_jobs_table(client, db, run_tasks):
+    def grouped():
+        counts = dict.fromkeys(blog.JOB_STATUSES, 0)
+        counts.update(dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()))
+        return counts
+
+    def maintained():
+        counts = dict(blog.task_executor.stats(db.cursor())['counts'])
+        counts['pending'] += counts.pop('scheduled')
+        return counts
+
+    client.get('/')  # schedules the periodic tasks
+    failing = add_job(db, 'pending')
+    db.execute("UPDATE jobs SET max_attempts = 1 WHERE id = ?", (failing,))
+    db.commit()
+    assert maintained() == grouped()
+
+    run_tasks()
+    assert db.execute("SELECT status FROM jobs WHERE id = ?", (failing,)).fetchone()[0] == 'failed'
+    assert maintained() == grouped()
+
+    db.execute("DELETE FROM jobs WHERE status = 'failed'")
+    db.commit()
+    assert maintained() == grouped()
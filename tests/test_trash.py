@@ -0,0 +1,85 @@
+import io
+import os
+
+import app as blog
+
+
+def image_bytes():
+    try:
+        from PIL import Image
+    except ImportError:
+        return b'\x89PNG\r\n\x1a\n' + b'0' * 64
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def save_post_with_image(admin, title, data):
+    admin.post(f'{blog.ADMIN_PREFIX}/posts/save', content_type='multipart/form-data',
+               data={'title': title, 'excerpt': 'e', 'content': '<p>c</p>', 'category': 'Genel',
+                     'images': (io.BytesIO(data), 'photo.png')})
+    with blog.app.app_context():
+        return blog.get_db().execute("SELECT MAX(id) FROM posts WHERE title = ?", (title,)).fetchone()[0]
+
+
+def blob_rows(db):
+    return [tuple(row) for row in db.execute("SELECT filename, refcount FROM blobs")]
+
+
+def test_identical_uploads_share_one_refcounted_file(app, admin, db, run_tasks):
+    data = image_bytes()
+    first = save_post_with_image(admin, 'Bir', data)
+    second = save_post_with_image(admin, 'İki', data)
+    run_tasks()
+
+    [(filename, refcount)] = blob_rows(db)
+    assert refcount == 2
+    path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    assert os.path.exists(path)
+
+    # Purging one post keeps the file the other still uses
+    admin.post(f'{blog.ADMIN_PREFIX}/posts/delete/{first}')
+    admin.post(f'{blog.ADMIN_PREFIX}/trash/purge', json={'items': [{'type': 'post', 'id': first}]})
+    run_tasks()
+    assert blob_rows(db) == [(filename, 1)]
+    assert os.path.exists(path)
+
+    # Purging the last reference removes the file and its blob
+    admin.post(f'{blog.ADMIN_PREFIX}/posts/delete/{second}')
+    admin.post(f'{blog.ADMIN_PREFIX}/trash/purge', json={'all': True})
+    run_tasks()
+    assert blob_rows(db) == []
+    assert not os.path.exists(path)
+    assert db.execute("SELECT COUNT(*) FROM image_derivatives").fetchone()[0] == 0
+
+
+def test_purge_older_than_keeps_recent_trash(admin, db):
+    ids = [db.execute("INSERT INTO posts (title, content) VALUES (?, '')", (f'T{i}',)).lastrowid for i in range(3)]
+    db.execute("UPDATE posts SET is_deleted = 1, deleted_at = datetime('now', '-40 days') WHERE id IN (?, ?)", ids[:2])
+    db.execute("UPDATE posts SET is_deleted = 1, deleted_at = datetime('now', '-1 day') WHERE id = ?", (ids[2],))
+    db.commit()
+
+    response = admin.post(f'{blog.ADMIN_PREFIX}/trash/purge', json={'older_than_days': 30})
+    assert response.get_json()['deleted']['post'] == 2
+    remaining = [row[0] for row in db.execute("SELECT id FROM posts WHERE id IN (?, ?, ?)", ids)]
+    assert remaining == [ids[2]]
+
+
+def test_trash_counters_follow_delete_restore_and_purge(admin, db):
+    def counters():
+        return blog.get_counters(db.cursor(), ['published_posts', 'trashed_items'])
+
+    start = counters()
+    post_id = db.execute("INSERT INTO posts (title, content) VALUES ('Sayaç', '')").lastrowid
+    db.commit()
+    assert counters() == {'published_posts': start['published_posts'] + 1, 'trashed_items': start['trashed_items']}
+
+    admin.post(f'{blog.ADMIN_PREFIX}/posts/delete/{post_id}')
+    assert counters() == {'published_posts': start['published_posts'], 'trashed_items': start['trashed_items'] + 1}
+
+    admin.post(f'{blog.ADMIN_PREFIX}/trash/restore/post/{post_id}')
+    assert counters() == {'published_posts': start['published_posts'] + 1, 'trashed_items': start['trashed_items']}
+
+    admin.post(f'{blog.ADMIN_PREFIX}/posts/delete/{post_id}')
+    admin.post(f'{blog.ADMIN_PREFIX}/trash/purge', json={'items': [{'type': 'post', 'id': post_id}]})
+    assert counters() == start
@@ -0,0 +1,98 @@
+import gzip
+
+from werkzeug.test import Client
+
+from wsgi import GzipMiddleware
+
+
+BODY = b'<p>merhaba dunya</p>' * 200
+
+
+def make_app(body=BODY, status='200 OK', content_type='text/html; charset=utf-8', extra=(), chunks=1):
+    def wsgi_app(environ, start_response):
+        headers = [('Content-Type', content_type), ('ETag', '"v1"'), *extra]
+        if chunks == 1:
+            headers.append(('Content-Length', str(len(body))))
+        start_response(status, headers)
+        if environ['REQUEST_METHOD'] == 'HEAD' or status.startswith('304'):
+            return [b'']
+        size = -(-len(body) // chunks)
+        return [body[i:i + size] for i in range(0, len(body), size)]
+    return wsgi_app
+
+
+def get(wsgi_app, method='GET', gzip_ok=True, min_size=1024):
+    headers = {'Accept-Encoding': 'gzip, deflate'} if gzip_ok else {}
+    return Client(GzipMiddleware(wsgi_app, min_size=min_size)).open('/', method=method, headers=headers)
+
+
+def test_large_html_is_gzipped_with_a_weak_etag():
+    response = get(make_app())
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == 'W/"v1"'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.get_data()) == BODY
+
+
+def test_streamed_chunks_decompress_to_the_whole_body():
+    response = get(make_app(chunks=7))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == BODY
+
+
+def test_small_body_is_sent_as_is_with_the_same_validator():
+    response = get(make_app(body=b'<p>kisa</p>'))
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == 'W/"v1"'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.get_data() == b'<p>kisa</p>'
+
+
+def test_client_without_gzip_gets_the_strong_etag():
+    response = get(make_app(), gzip_ok=False)
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == '"v1"'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.get_data() == BODY
+
+
+def test_not_modified_matches_the_gzipped_validator():
+    response = get(make_app(body=b'', status='304 Not Modified'))
+    assert response.status_code == 304
+    assert response.headers['ETag'] == 'W/"v1"'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_head_gets_the_headers_of_a_gzipped_get():
+    response = get(make_app(), method='HEAD')
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == 'W/"v1"'
+    assert 'Content-Length' not in response.headers
+    assert response.get_data() == b''
+
+
+def test_no_transform_and_binary_types_are_left_alone():
+    no_transform = get(make_app(extra=[('Cache-Control', 'no-transform')]))
+    assert 'Content-Encoding' not in no_transform.headers
+    assert no_transform.headers['ETag'] == '"v1"'
+    assert no_transform.get_data() == BODY
+
+    image = get(make_app(content_type='image/png'))
+    assert 'Content-Encoding' not in image.headers
+    assert image.get_data() == BODY
+
+
+def test_gzipped_page_revalidates_with_its_weak_etag(app, create_post):
+    post_id = create_post('Sıkıştırılmış', content='<p>' + 'uzun metin ' * 300 + '</p>')
+    client = Client(GzipMiddleware(app))
+    headers = {'Accept-Encoding': 'gzip'}
+
+    first = client.get(f'/post/{post_id}', headers=headers)
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].startswith('W/')
+
+    again = client.get(f'/post/{post_id}', headers=dict(headers, **{'If-None-Match': first.headers['ETag']}))
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert again.headers['Vary'] == first.headers['Vary']
@@ -1 +1,167 @@
-from app import app as application
+import os
+import zlib
+
+from app import app
+
+
+# Content types worth compressing; images and archives are already compressed
+GZIP_CONTENT_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'text/xml',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+}
+
+
+def _accepts_gzip(environ):
+    for part in environ.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            q = params.strip()
+            if q.startswith('q='):
+                try:
+                    return float(q[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+    return False
+
+
+# Compresses responses on the fly, chunk by chunk, without buffering the body.
+# Only the first min_size bytes are held back, to decide whether a small
+# response is worth compressing at all.
+class GzipMiddleware:
+    def __init__(self, wsgi_app, min_size=1024, level=6, content_types=None):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.level = level
+        self.content_types = content_types or GZIP_CONTENT_TYPES
+
+    def __call__(self, environ, start_response):
+        state = {}
+
+        def deferred_start_response(status, headers, exc_info=None):
+            state['status'] = status
+            state['headers'] = headers
+            state['exc_info'] = exc_info
+            return self._unsupported_write
+
+        app_iter = self.wsgi_app(environ, deferred_start_response)
+        return self._stream(app_iter, state, start_response, _accepts_gzip(environ),
+                            environ.get('REQUEST_METHOD') == 'HEAD')
+
+    @staticmethod
+    def _unsupported_write(data):
+        raise RuntimeError('The WSGI write() callable is not supported under GzipMiddleware')
+
+    def _compressible(self, status, headers):
+        # Whether this response could be sent gzipped; its size only decides
+        # whether it actually is, so small bodies still get Vary and the weak ETag
+        if not status.startswith('200'):
+            return False
+        content_type = ''
+        for name, value in headers:
+            lname = name.lower()
+            if lname == 'content-encoding':
+                return False
+            if lname == 'content-type':
+                content_type = value.split(';', 1)[0].strip().lower()
+            if lname == 'cache-control' and 'no-transform' in value.lower():
+                return False
+        return content_type in self.content_types
+
+    def _stream(self, app_iter, state, start_response, accepts_gzip, head=False):
+        try:
+            chunks = iter(app_iter)
+            held = []
+            held_size = 0
+            # Hold back just enough of the body to apply the size threshold
+            for chunk in chunks:
+                if chunk:
+                    held.append(chunk)
+                    held_size += len(chunk)
+                if held_size >= self.min_size:
+                    break
+            else:
+                chunks = iter(())
+
+            status, headers = state['status'], list(state['headers'])
+            if status.startswith('304'):
+                # A 304 must carry the Vary and the validator the full response would have had
+                headers = self._vary(headers)
+                if accepts_gzip:
+                    headers = self._weak_etag(headers)
+            if not self._compressible(status, headers):
+                start_response(status, headers, state.get('exc_info'))
+                yield from held
+                yield from chunks
+                return
+
+            headers = self._vary(headers)
+            if accepts_gzip:
+                # Weak whether or not this body ends up compressed, so the 200
+                # and its 304s always agree on the validator
+                headers = self._weak_etag(headers)
+            if head:
+                # Same headers a GET would get, without a body to compress
+                if accepts_gzip and self._content_length(headers) >= self.min_size:
+                    headers = self._gzip_headers(headers)
+                start_response(status, headers, state.get('exc_info'))
+                yield from held
+                yield from chunks
+                return
+            if not accepts_gzip or held_size < self.min_size:
+                start_response(status, headers, state.get('exc_info'))
+                yield from held
+                yield from chunks
+                return
+
+            start_response(status, self._gzip_headers(headers), state.get('exc_info'))
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            for chunk in held:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            for chunk in chunks:
+                # Sync-flush each chunk the app yields so streamed pages stay streamed
+                data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+            yield compressor.flush()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    def _vary(self, headers):
+        # The representation depends on Accept-Encoding whether or not we compress
+        for i, (name, value) in enumerate(headers):
+            if name.lower() == 'vary':
+                if 'accept-encoding' not in value.lower():
+                    headers[i] = (name, f"{value}, Accept-Encoding")
+                return headers
+        headers.append(('Vary', 'Accept-Encoding'))
+        return headers
+
+    def _weak_etag(self, headers):
+        # The gzipped bytes differ, so the validator is only weakly equivalent
+        return [(name, 'W/' + value if name.lower() == 'etag' and not value.startswith('W/') else value)
+                for name, value in headers]
+
+    def _content_length(self, headers):
+        for name, value in headers:
+            if name.lower() == 'content-length':
+                try:
+                    return int(value)
+                except ValueError:
+                    return 0
+        return 0
+
+    def _gzip_headers(self, headers):
+        result = [(name, value) for name, value in self._weak_etag(headers) if name.lower() != 'content-length']
+        result.append(('Content-Encoding', 'gzip'))
+        return result
+
+
+application = GzipMiddleware(
+    app,
+    min_size=int(os.environ.get('GZIP_MIN_SIZE', '1024')),
+    level=int(os.environ.get('GZIP_LEVEL', '6')),
+)